@@ -0,0 +1,105 @@
+# Headless Acquisition (no Dash / Plotly / pandas)
+import argparse
+import csv
+import threading
+import time
+from datetime import datetime
+from sources import add_source_arguments, sensor_from_args, start_sensor, stop_sensor
+
+
+class RunRecorder:
+    def __init__(self, sensor, path, poll_interval=0.2):
+        """
+        Appends every new sensor sample to a CSV file
+
+        The file has the same columns as the dashboard's CSV export, so a
+        recording can be replayed or used as a reference run. Sensors with
+        add_raw_listener() push every full-rate point, together with raw_*
+        columns holding the uncalibrated values (see
+        calibration.recalibrate_file); others are polled.
+        """
+        self.sensor = sensor
+        self.path = path
+        self.poll_interval = poll_interval
+        self.last_x = 0
+        self.count = 0
+        self.file = None
+        self.writer = None
+        self.lock = threading.Lock()
+        self.closed = False
+        self.pushed = hasattr(sensor, 'add_raw_listener')
+        if self.pushed:
+            sensor.add_raw_listener(self.write)
+
+    def poll(self):
+        """Write samples that arrived since the last poll"""
+        if self.pushed:
+            return 0
+        return self.write([d for d in self.sensor.get_latest_data(1000) if d['x_value'] > self.last_x])
+
+    def write(self, new_points, raw=None):
+        """Append points (and optionally their raw values) to the CSV file"""
+        if not new_points:
+            return 0
+        if raw is not None:
+            # Only raw-pushing (numpy-based) sensors get here; calibration imports numpy
+            from calibration import CHANNELS
+            new_points = [
+                dict(point, **{f'raw_{name}': value for name, value in zip(CHANNELS, row)})
+                for point, row in zip(new_points, raw.tolist())
+            ]
+        with self.lock:
+            if self.closed:
+                return 0
+            if self.writer is None:
+                self.file = open(self.path, 'w', newline='')
+                self.writer = csv.DictWriter(self.file, fieldnames=list(new_points[0]), extrasaction='ignore')
+                self.writer.writeheader()
+            self.writer.writerows(new_points)
+            self.file.flush()
+            self.last_x = new_points[-1]['x_value']
+            self.count += len(new_points)
+            return len(new_points)
+
+    def run(self, duration=None):
+        """Record until duration seconds have passed (forever if None)"""
+        start = time.monotonic()
+        while duration is None or time.monotonic() - start < duration:
+            self.poll()
+            time.sleep(self.poll_interval)
+        self.poll()
+
+    def close(self):
+        """Close the output file"""
+        with self.lock:
+            self.closed = True
+            if self.file:
+                self.file.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record propeller sensor data without the dashboard")
+    add_source_arguments(parser)
+    parser.add_argument('--output', default=None,
+                        help="CSV output file (default: propeller_data_<timestamp>.csv)")
+    parser.add_argument('--duration', type=float, default=None, help="seconds to record (default: until Ctrl+C)")
+    args = parser.parse_args()
+
+    output = args.output or f"propeller_data_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.csv"
+    sensor = sensor_from_args(args)
+    # The recorder's listener has to be in place before the first sample
+    recorder = RunRecorder(sensor, output)
+    start_sensor(sensor)
+    print(f"💾 Recording to {output}")
+    try:
+        recorder.run(args.duration)
+    except KeyboardInterrupt:
+        recorder.poll()
+    finally:
+        stop_sensor(sensor)
+        recorder.close()
+        print(f"🛑 Recorded {recorder.count} samples")
+
+
+if __name__ == '__main__':
+    main()
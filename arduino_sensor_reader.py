@@ -4,22 +4,68 @@ import serial.tools.list_ports
 import time
 import threading
 from collections import deque
+import numpy as np
+from calibration import CHANNELS, CalibrationProfile, load_profile_for
+
+# Binary frame: 0xAA 0x55, six little-endian float32 in CSV column order,
+# then a checksum byte (sum of the 24 payload bytes, modulo 256)
+BINARY_SYNC = b'\xaa\x55'
+BINARY_FRAME = np.dtype([('sync', 'u1', (2,)), ('payload', 'u1', (24,)), ('checksum', 'u1')])
 
 class ArduinoSensorReader:
-    def __init__(self, port=None, baudrate=115200):
+    def __init__(self, port=None, baudrate=115200, calibration_file=None, data_format='csv', reset_delay=2,
+                 aggregate_window=None, verbose=True):
         """
         Arduino sensor reader for real-time propeller data
 
         Expected CSV format from Arduino:
         Power,Voltage,Sound,Torque,RPM,Vibration
         426.5,240.2,46.3,272.1,12500,0.53
+
+        data_format='binary' reads fixed-size frames instead (see
+        BINARY_FRAME), for sample rates CSV text cannot keep up with.
+        verbose=False stops the per-batch "Received" console line.
+
+        aggregate_window=N also reduces every N raw samples to one summary
+        (mean/min/max/RMS/count per channel). get_latest_data() then serves
+        the summaries, so the dashboard's cost does not grow with the sample
+        rate; the raw stream stays available via get_raw_data() and
+        add_raw_listener().
+
+        Calibration is read from calibration_file, or from
+        calibration/<port>.json once the port is known, and is
+        hot-reloaded whenever the file changes.
         """
         self.port = port
         self.baudrate = baudrate
+        self.data_format = data_format
+        self.reset_delay = reset_delay
+        self.poll_interval = 0.1
+        self.verbose = verbose
         self.serial_conn = None
         self.running = False
         self.thread = None
         self.data_buffer = deque(maxlen=1000)
+        # Guards the buffers between the reader thread and recalibrate()
+        self.lock = threading.RLock()
+
+        # Tumbling-window summaries (low-rate stream for the dashboard)
+        self.aggregate_window = aggregate_window
+        self.summary_buffer = deque(maxlen=1000)
+        self.aggregate_buffer = deque(maxlen=1000)
+        # Open window, filled up to _window_fill rows before it is summarized
+        self._window_rows = np.empty((aggregate_window or 0, len(CHANNELS)))
+        self._window_fill = 0
+        # Sample number of the first row in _window_rows
+        self._window_start = 1
+
+        # Uncalibrated samples, kept so a new calibration can be re-applied
+        # (at least two windows, so recalibrate() can rebuild summaries)
+        self.raw_buffer = deque(maxlen=max(1000, 2 * (aggregate_window or 0)))
+        # Called with each batch of new raw points (e.g. to store the full-rate stream)
+        self.raw_listeners = []
+        # Called with each batch of new points of the get_latest_data() stream
+        self.point_listeners = []
 
         # Sensor ranges (for validation)
         self.sensor_ranges = {
@@ -32,14 +78,19 @@ class ArduinoSensorReader:
         }
 
         # Calibration (default: no calibration)
-        self.calibration = {
-            'Power': {'scale': 1.0, 'offset': 0.0},
-            'Voltage': {'scale': 1.0, 'offset': 0.0},
-            'Sound': {'scale': 1.0, 'offset': 0.0},
-            'Torque': {'scale': 1.0, 'offset': 0.0},
-            'rpm': {'scale': 1.0, 'offset': 0.0},
-            'Vibrations': {'scale': 1.0, 'offset': 0.0}
-        }
+        self.calibration_file = calibration_file
+        if calibration_file:
+            self.calibration = CalibrationProfile.load(calibration_file)
+        else:
+            self.calibration = CalibrationProfile()
+        self.calibration_check_interval = 1.0
+        self._last_calibration_check = 0.0
+
+        # Range limits as arrays, in CHANNELS order, for batch validation
+        self._range_low = np.array([self.sensor_ranges[c][0] for c in CHANNELS], dtype=float)
+        self._range_high = np.array([self.sensor_ranges[c][1] for c in CHANNELS], dtype=float)
+        # Only Power, Voltage and RPM reject a sample when out of range
+        self._range_checked = np.array([c in ('Power', 'Voltage', 'rpm') for c in CHANNELS])
 
         self.x = 0
 
@@ -65,89 +116,309 @@ class ArduinoSensorReader:
 
         try:
             self.serial_conn = serial.Serial(self.port, self.baudrate, timeout=1)
-            time.sleep(2)  # Wait for Arduino to reset
+            time.sleep(self.reset_delay)  # Wait for Arduino to reset
             print(f"✅ Connected to Arduino on {self.port}")
+            if not self.calibration_file:
+                self.calibration = load_profile_for(self.port)
+            print(f"🔧 Calibration: {self.calibration.version}")
             return True
         except Exception as e:
             print(f"❌ Connection error: {e}")
+            if self.serial_conn:
+                self.serial_conn.close()
+                self.serial_conn = None
             return False
 
-    def parse_line(self, line):
-        """Parse CSV line from Arduino"""
+    def parse_raw(self, line):
+        """Split a CSV line from Arduino into raw (uncalibrated) floats"""
         try:
             # Format: Power,Voltage,Sound,Torque,RPM,Vibration
             parts = line.strip().split(',')
             if len(parts) != 6:
                 return None
+            return [float(p) for p in parts]
+        except ValueError as e:
+            print(f"⚠️ Parse error: {e}")
+            return None
 
-            # Convert to float
-            power = float(parts[0])
-            voltage = float(parts[1])
-            sound = float(parts[2])
-            torque = float(parts[3])
-            rpm = float(parts[4])
-            vibration = float(parts[5])
-
-            # Apply calibration
-            power = power * self.calibration['Power']['scale'] + self.calibration['Power']['offset']
-            voltage = voltage * self.calibration['Voltage']['scale'] + self.calibration['Voltage']['offset']
-            sound = sound * self.calibration['Sound']['scale'] + self.calibration['Sound']['offset']
-            torque = torque * self.calibration['Torque']['scale'] + self.calibration['Torque']['offset']
-            rpm = rpm * self.calibration['rpm']['scale'] + self.calibration['rpm']['offset']
-            vibration = vibration * self.calibration['Vibrations']['scale'] + self.calibration['Vibrations']['offset']
-
-            # Validate ranges
-            if not (self.sensor_ranges['Power'][0] <= power <= self.sensor_ranges['Power'][1]):
-                print(f"⚠️ Power out of range: {power}")
-                return None
-            if not (self.sensor_ranges['Voltage'][0] <= voltage <= self.sensor_ranges['Voltage'][1]):
-                print(f"⚠️ Voltage out of range: {voltage}")
-                return None
-            if not (self.sensor_ranges['rpm'][0] <= rpm <= self.sensor_ranges['rpm'][1]):
-                print(f"⚠️ RPM out of range: {rpm}")
-                return None
+    def process_batch(self, raw_rows):
+        """
+        Calibrate and validate a batch of raw samples in one pass
 
-            self.x += 1
+        The points are numbered after the last ingested sample, but nothing
+        is stored; use ingest() to add them to the buffers.
+        """
+        with self.lock:
+            return self._process(raw_rows)[0]
 
-            return {
-                'x_value': self.x,
-                'Power': round(power, 2),
-                'Voltage': round(voltage, 2),
-                'Sound': round(sound, 2),
-                'Torque': round(torque, 2),
-                'rpm': round(rpm, 2),
-                'Vibrations': round(vibration, 3)
-            }
+    def _process(self, raw_rows):
+        """process_batch() that also returns the raw rows that passed validation"""
+        if not len(raw_rows):
+            empty = np.empty((0, len(CHANNELS)))
+            return [], empty, empty
+        raw = np.asarray(raw_rows, dtype=float)
+        calibration = self.calibration
+        values = calibration.apply(raw)
 
-        except Exception as e:
-            print(f"⚠️ Parse error: {e}")
+        # Validate ranges
+        in_range = (values >= self._range_low) & (values <= self._range_high)
+        bad = ~in_range & self._range_checked
+        valid = ~bad.any(axis=1)
+        for row in np.flatnonzero(~valid):
+            for i in np.flatnonzero(bad[row]):
+                label = 'RPM' if CHANNELS[i] == 'rpm' else CHANNELS[i]
+                print(f"⚠️ {label} out of range: {values[row, i]}")
+
+        points = [self._make_point(self.x + i, row, calibration.version)
+                  for i, row in enumerate(values[valid].tolist(), 1)]
+        return points, raw[valid], values[valid]
+
+    def ingest(self, raw_rows):
+        """Process a batch, store it and pass it (with its raw values) to the listeners"""
+        with self.lock:
+            points, raw, values = self._process(raw_rows)
+            self.x += len(points)
+            self.raw_buffer.extend(zip((p['x_value'] for p in points), raw.tolist()))
+            shown = self._store(points, values)
+        self._notify(points, raw, shown)
+        return points
+
+    def _store(self, points, values):
+        """
+        Store new points and fold them into the summaries (caller holds the lock)
+
+        Returns the new points of the get_latest_data() stream.
+        """
+        self.data_buffer.extend(points)
+        if not self.aggregate_window:
+            return points
+        return self._aggregate(values) if len(values) else []
+
+    def _notify(self, points, raw, shown):
+        """Pass new points and their raw values, then new shown points, to the listeners"""
+        if points:
+            for listener in self.raw_listeners:
+                listener(points, raw)
+        if shown:
+            for listener in self.point_listeners:
+                listener(shown)
+
+    def _aggregate(self, values):
+        """Reduce every complete window of calibrated samples to one summary, returning the new summaries"""
+        size = self.aggregate_window
+        summaries = []
+        stats = []
+        pos = 0
+        # Top up the open window first
+        if self._window_fill:
+            pos = min(size - self._window_fill, len(values))
+            self._window_rows[self._window_fill:self._window_fill + pos] = values[:pos]
+            self._window_fill += pos
+            if self._window_fill == size:
+                summaries, stats = self._summarize(self._window_rows, self._window_start)
+                self._window_start += size
+                self._window_fill = 0
+        # Complete windows straight from the batch, without copying
+        n_windows = (len(values) - pos) // size
+        if n_windows:
+            more, more_stats = self._summarize(values[pos:pos + n_windows * size], self._window_start)
+            summaries += more
+            stats += more_stats
+            self._window_start += n_windows * size
+            pos += n_windows * size
+        # The rest opens the next window
+        if pos < len(values):
+            self._window_fill = len(values) - pos
+            self._window_rows[:self._window_fill] = values[pos:]
+        self.summary_buffer.extend(summaries)
+        self.aggregate_buffer.extend(stats)
+        return summaries
+
+    def _summarize(self, rows, first_sample):
+        """Summaries and statistics of complete windows, rows starting at a window boundary"""
+        size = self.aggregate_window
+        n_windows = len(rows) // size
+        windows = rows.reshape(n_windows, size, len(CHANNELS))
+        means = windows.mean(axis=1)
+        mins = windows.min(axis=1)
+        maxs = windows.max(axis=1)
+        rms = np.sqrt((windows * windows).mean(axis=1))
+        first_window = (first_sample - 1) // size + 1
+        summaries = []
+        stats = []
+        for i, row in enumerate(means.tolist()):
+            summary = self._make_point(first_window + i, row, self.calibration.version)
+            summary['samples'] = size
+            # Raw sample number at the window centre, for time alignment
+            summary['sample'] = first_sample + i * size + (size - 1) / 2
+            summaries.append(summary)
+            stats.append({
+                'window': first_window + i,
+                'count': size,
+                'mean': means[i],
+                'min': mins[i],
+                'max': maxs[i],
+                'rms': rms[i]
+            })
+        return summaries, stats
+
+    @staticmethod
+    def _make_point(x, row, version):
+        """Build a data point from calibrated values in CHANNELS order"""
+        point = {'x_value': x}
+        for name, value in zip(CHANNELS, row):
+            point[name] = round(value, 3 if name == 'Vibrations' else 2)
+        point['calibration'] = version
+        return point
+
+    def decode_binary(self, buf):
+        """Decode complete binary frames, returning (raw rows, leftover bytes)"""
+        rows = []
+        pos = 0
+        while True:
+            start = buf.find(BINARY_SYNC, pos)
+            if start < 0:
+                # Keep a trailing first sync byte, its frame may still be arriving
+                return rows, buf[-1:] if buf.endswith(BINARY_SYNC[:1]) else b''
+            n = (len(buf) - start) // BINARY_FRAME.itemsize
+            if n == 0:
+                return rows, buf[start:]
+
+            frames = np.frombuffer(buf, dtype=BINARY_FRAME, count=n, offset=start)
+            checksum = frames['payload'].sum(axis=1, dtype=np.uint32) & 0xFF
+            ok = (frames['sync'] == np.frombuffer(BINARY_SYNC, dtype='u1')).all(axis=1)
+            ok &= checksum == frames['checksum']
+            bad = np.flatnonzero(~ok)
+            good = int(bad[0]) if bad.size else n
+
+            if good:
+                values = frames['payload'][:good].copy().view('<f4')
+                rows.extend(values.astype(float).tolist())
+            pos = start + good * BINARY_FRAME.itemsize
+            if good == n:
+                return rows, buf[pos:]
+            pos += 1  # Corrupt frame: resync after its first byte
+
+    def parse_line(self, line):
+        """Parse CSV line from Arduino"""
+        raw = self.parse_raw(line)
+        if raw is None:
             return None
+        points = self.process_batch([raw])
+        return points[0] if points else None
+
+    def recalibrate(self, profile=None):
+        """
+        Re-apply a calibration to the buffered raw samples in one vectorized pass
+
+        Only the samples still in memory are covered; for a recording use
+        calibration.recalibrate_file() on its raw_* columns.
+        """
+        with self.lock:
+            if profile is not None:
+                self.calibration = profile
+            calibration = self.calibration
+            snapshot = list(self.raw_buffer)
+        if not snapshot:
+            return []
+        xs = [x for x, _ in snapshot]
+        values = calibration.apply([raw for _, raw in snapshot])
+        points = [self._make_point(x, row, calibration.version)
+                  for x, row in zip(xs, values.tolist())]
+        with self.lock:
+            # Samples ingested meanwhile already used the new calibration
+            newer = [p for p in self.data_buffer if p['x_value'] > xs[-1]]
+            buffer = deque(points, maxlen=self.data_buffer.maxlen)
+            buffer.extend(newer)
+            self.data_buffer = buffer
+            if self.aggregate_window and xs[-1] - xs[0] + 1 == len(xs):
+                self._resummarize(xs[0], values)
+        return points
 
-    def start_reading(self):
-        """Start reading from Arduino"""
+    def _resummarize(self, first_sample, values):
+        """Rebuild the summaries covered by recalibrated contiguous samples"""
+        size = self.aggregate_window
+        # Complete windows inside the samples that were already summarized
+        start = (first_sample - 1 + size - 1) // size * size + 1
+        end = min(first_sample + len(values), self._window_start)
+        n_windows = max(0, (end - start) // size)
+        if n_windows:
+            offset = start - first_sample
+            summaries, stats = self._summarize(values[offset:offset + n_windows * size], start)
+            by_window = {s['x_value']: (s, st) for s, st in zip(summaries, stats)}
+            self.summary_buffer = deque(
+                (by_window[s['x_value']][0] if s['x_value'] in by_window else s for s in self.summary_buffer),
+                maxlen=self.summary_buffer.maxlen)
+            self.aggregate_buffer = deque(
+                (by_window[a['window']][1] if a['window'] in by_window else a for a in self.aggregate_buffer),
+                maxlen=self.aggregate_buffer.maxlen)
+        # The open window's rows that were recalibrated
+        offset = self._window_start - first_sample
+        if offset >= 0:
+            rows = values[offset:offset + self._window_fill]
+            self._window_rows[:len(rows)] = rows
+
+    def check_calibration(self):
+        """Pick up calibration file changes without stopping acquisition"""
+        now = time.monotonic()
+        if now - self._last_calibration_check < self.calibration_check_interval:
+            return
+        self._last_calibration_check = now
+        if self.calibration.path:
+            self.calibration = self.calibration.reload_if_changed()
+        elif self.port:
+            profile = load_profile_for(self.port)
+            if profile.path:
+                print(f"🔧 Calibration loaded: {profile.version}")
+                self.calibration = profile
+
+    def start_reading(self, fallback=True):
+        """
+        Start reading from Arduino
+
+        If the connection fails, simulated data is used instead, unless
+        fallback=False. Returns True only when reading from the port.
+        """
         if not self.connect():
+            if not fallback:
+                print("❌ Failed to connect.")
+                return False
             print("❌ Failed to connect. Using simulated data.")
             self._start_simulated()
-            return
+            return False
 
         self.running = True
         self.thread = threading.Thread(target=self._read_loop)
         self.thread.daemon = True
         self.thread.start()
         print("🚀 Arduino data reading started!")
+        return True
 
     def _read_loop(self):
         """Background thread to read Arduino data"""
+        pending = b''
         while self.running:
             try:
+                self.check_calibration()
                 if self.serial_conn and self.serial_conn.in_waiting:
-                    line = self.serial_conn.readline().decode('utf-8', errors='ignore')
-                    data_point = self.parse_line(line)
-                    if data_point:
-                        self.data_buffer.append(data_point)
+                    # Drain everything already buffered and calibrate it as one batch
+                    pending += self.serial_conn.read(self.serial_conn.in_waiting)
+                    if self.data_format == 'binary':
+                        raw_rows, pending = self.decode_binary(pending)
+                    else:
+                        lines = pending.split(b'\n')
+                        pending = lines.pop()
+                        raw_rows = []
+                        for line in lines:
+                            raw = self.parse_raw(line.decode('utf-8', errors='ignore'))
+                            if raw is not None:
+                                raw_rows.append(raw)
+                    points = self.ingest(raw_rows)
+                    if points and self.verbose:
+                        data_point = points[-1]
                         print(f"📊 Received: Power={data_point['Power']}W, RPM={data_point['rpm']}")
                 else:
-                    time.sleep(0.1)
+                    time.sleep(self.poll_interval)
             except Exception as e:
                 print(f"❌ Read error: {e}")
                 time.sleep(1)
@@ -159,17 +430,21 @@ class ArduinoSensorReader:
 
         def simulate():
             while self.running:
-                self.x += 1
-                data_point = {
-                    'x_value': self.x,
-                    'Power': round(200 + random.uniform(-50, 50), 2),
-                    'Voltage': round(240 + random.uniform(-20, 20), 2),
-                    'Sound': round(50 + random.uniform(-10, 10), 2),
-                    'Torque': round(300 + random.uniform(-50, 50), 2),
-                    'rpm': round(12000 + random.uniform(-1000, 1000), 2),
-                    'Vibrations': round(0.5 + random.uniform(-0.2, 0.2), 3)
-                }
-                self.data_buffer.append(data_point)
+                with self.lock:
+                    self.x += 1
+                    data_point = {
+                        'x_value': self.x,
+                        'Power': round(200 + random.uniform(-50, 50), 2),
+                        'Voltage': round(240 + random.uniform(-20, 20), 2),
+                        'Sound': round(50 + random.uniform(-10, 10), 2),
+                        'Torque': round(300 + random.uniform(-50, 50), 2),
+                        'rpm': round(12000 + random.uniform(-1000, 1000), 2),
+                        'Vibrations': round(0.5 + random.uniform(-0.2, 0.2), 3)
+                    }
+                    # Same path as real data: buffer, summaries, then listeners
+                    values = np.array([[data_point[name] for name in CHANNELS]])
+                    shown = self._store([data_point], values)
+                self._notify([data_point], values, shown)
                 time.sleep(1)
 
         self.thread = threading.Thread(target=simulate)
@@ -177,18 +452,54 @@ class ArduinoSensorReader:
         self.thread.start()
         print("⚠️ Using simulated data (Arduino not connected)")
 
+    def _display_buffer(self):
+        """Summaries when aggregating, otherwise the raw samples"""
+        return self.summary_buffer if self.aggregate_window else self.data_buffer
+
     def get_latest_data(self, num_points=100):
         """Get latest N data points"""
-        if not self.data_buffer:
+        buffer = self._display_buffer()
+        if not buffer:
             return []
-        return list(self.data_buffer)[-num_points:]
+        return list(buffer)[-num_points:]
 
     def get_latest_point(self):
         """Get most recent data point"""
-        if self.data_buffer:
-            return self.data_buffer[-1]
+        buffer = self._display_buffer()
+        if buffer:
+            return buffer[-1]
         return None
 
+    def get_raw_data(self, num_points=100):
+        """Get latest N full-rate data points"""
+        if not self.data_buffer:
+            return []
+        return list(self.data_buffer)[-num_points:]
+
+    def get_aggregates(self, num_windows=100):
+        """Latest window statistics as arrays: mean/min/max/rms (n, channels) and count (n)"""
+        windows = list(self.aggregate_buffer)[-num_windows:]
+        if not windows:
+            return None
+        result = {key: np.array([w[key] for w in windows]) for key in ('window', 'count')}
+        for key in ('mean', 'min', 'max', 'rms'):
+            result[key] = np.vstack([w[key] for w in windows])
+        return result
+
+    def add_raw_listener(self, callback):
+        """Call callback(points, raw) with every batch of new full-rate points
+
+        raw holds the matching uncalibrated values, shape (len(points), channels).
+        """
+        self.raw_listeners.append(callback)
+
+    def add_point_listener(self, callback):
+        """Call callback(points) with every batch of new get_latest_data() points
+
+        These are the summaries when aggregating, otherwise the raw points.
+        """
+        self.point_listeners.append(callback)
+
     def stop_reading(self):
         """Stop reading and close connection"""
         self.running = False
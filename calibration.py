@@ -0,0 +1,195 @@
+# Sensor Calibration Profiles
+import os
+import csv
+import json
+import numpy as np
+
+CALIBRATION_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calibration')
+
+# Column order of the Arduino CSV line and of every calibration batch
+CHANNELS = ('Power', 'Voltage', 'Sound', 'Torque', 'rpm', 'Vibrations')
+
+# Modification time of profile files that failed to load: path -> mtime,
+# so a broken file is reported once rather than on every check
+_failed = {}
+
+
+class CalibrationProfile:
+    def __init__(self, channels=None, version='uncalibrated', path=None):
+        """
+        Per-device calibration compiled into coefficient arrays
+
+        Profile file format (JSON), any channel left out stays raw:
+        {
+            "version": "2025-11-10",
+            "channels": {
+                "Power": {"type": "linear", "scale": 1.02, "offset": -3.0},
+                "Torque": {"type": "polynomial", "coefficients": [0.1, 0.98, 0.0004]},
+                "rpm": {"type": "table", "x": [0, 3000, 6000], "y": [0, 2950, 6010]}
+            }
+        }
+
+        Polynomial coefficients are in ascending order (c0 + c1·x + c2·x² ...).
+        """
+        self.version = str(version)
+        self.path = path
+        self.mtime = os.path.getmtime(path) if path else None
+        self.channels = channels or {}
+        self._compile()
+
+    def _compile(self):
+        """Turn the channel specs into one coefficient matrix plus lookup tables"""
+        polys = []
+        self.tables = []
+        for i, name in enumerate(CHANNELS):
+            spec = self.channels.get(name, {})
+            kind = spec.get('type', 'linear')
+            if kind == 'linear':
+                polys.append(self._numbers(name, [spec.get('offset', 0.0), spec.get('scale', 1.0)]))
+            elif kind == 'polynomial':
+                coefficients = self._numbers(name, spec['coefficients'])
+                if not len(coefficients):
+                    raise ValueError(f"Calibration polynomial for {name} has no coefficients")
+                polys.append(coefficients)
+            elif kind == 'table':
+                x = self._numbers(name, spec['x'])
+                y = self._numbers(name, spec['y'])
+                if not len(x) or len(x) != len(y):
+                    raise ValueError(f"Calibration table for {name} needs matching, non-empty x and y "
+                                     f"(got {len(x)} and {len(y)} points)")
+                order = np.argsort(x)
+                self.tables.append((i, x[order], y[order]))
+                polys.append([0.0, 1.0])
+            else:
+                raise ValueError(f"Unknown calibration type for {name}: {kind}")
+
+        # coefficients[k, i] multiplies x**k of channel i
+        degree = max(len(p) for p in polys)
+        self.coefficients = np.zeros((degree, len(CHANNELS)))
+        for i, p in enumerate(polys):
+            self.coefficients[:len(p), i] = p
+
+    @staticmethod
+    def _numbers(name, values):
+        """A channel spec's list of numbers as a 1-D float array"""
+        try:
+            array = np.asarray(values, dtype=float)
+        except (TypeError, ValueError):
+            raise ValueError(f"Calibration values for {name} must be numbers: {values!r}")
+        if not np.isfinite(array).all():
+            raise ValueError(f"Calibration values for {name} must be finite numbers: {values!r}")
+        if array.ndim != 1:
+            raise ValueError(f"Calibration values for {name} must be a flat list: {values!r}")
+        return array
+
+    @classmethod
+    def load(cls, path):
+        """Load a profile from a JSON file"""
+        with open(path) as f:
+            spec = json.load(f)
+        return cls(spec.get('channels', {}), version=spec.get('version', os.path.basename(path)), path=path)
+
+    def apply(self, raw):
+        """Calibrate a batch of raw samples, shape (n, len(CHANNELS))"""
+        raw = np.asarray(raw, dtype=float)
+        # Horner's rule across every channel at once
+        out = np.broadcast_to(self.coefficients[-1], raw.shape).copy()
+        for k in range(len(self.coefficients) - 2, -1, -1):
+            out *= raw
+            out += self.coefficients[k]
+        for i, x, y in self.tables:
+            out[:, i] = np.interp(raw[:, i], x, y)
+        return out
+
+    def reload_if_changed(self):
+        """
+        Return a freshly loaded profile if the file changed on disk, else self
+
+        A file that fails to load keeps this profile in use; it is retried
+        only after it changes again.
+        """
+        if not self.path:
+            return self
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError as e:
+            # A missing file is reported once, until it is back
+            if _failed.get(self.path, 0) is not None:
+                print(f"⚠️ Calibration reload failed, keeping {self.version}: {e}")
+            _failed[self.path] = None
+            return self
+        if mtime == self.mtime or _failed.get(self.path) == mtime:
+            return self
+        profile = _try_load(self.path, mtime, f"Calibration reload failed, keeping {self.version}")
+        if profile is None:
+            return self
+        print(f"🔧 Calibration reloaded: {profile.version}")
+        return profile
+
+
+def _try_load(path, mtime, message):
+    """Load a profile, or report the error once per file version and return None"""
+    try:
+        profile = CalibrationProfile.load(path)
+    except Exception as e:
+        _failed[path] = mtime
+        print(f"⚠️ {message}: {e}")
+        return None
+    _failed.pop(path, None)
+    return profile
+
+
+def calibration_path_for(device, directory=CALIBRATION_DIR):
+    """Profile file for a serial device, e.g. COM3 -> calibration/COM3.json"""
+    name = os.path.basename(str(device)) or 'default'
+    return os.path.join(directory, f"{name}.json")
+
+
+def load_profile_for(device, directory=CALIBRATION_DIR):
+    """Load the device's profile, falling back to default.json, then to no calibration"""
+    for path in (calibration_path_for(device, directory), os.path.join(directory, 'default.json')):
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            continue
+        # A file that already failed is skipped until it changes
+        if _failed.get(path) == mtime:
+            continue
+        profile = _try_load(path, mtime, f"Calibration error in {path}")
+        if profile is not None:
+            return profile
+    return CalibrationProfile()
+
+
+def recalibrate_file(path, profile, output=None):
+    """
+    Re-apply a profile to a recording in one vectorized pass
+
+    The recording needs the raw_<channel> columns acquire.py writes; the
+    calibrated columns and the calibration version are replaced. Writes to
+    output, or back to path if not given. Returns the number of samples.
+    """
+    with open(path, newline='') as f:
+        reader = csv.DictReader(f)
+        fieldnames = reader.fieldnames
+        rows = list(reader)
+    raw_names = [f'raw_{name}' for name in CHANNELS]
+    missing = [name for name in raw_names if name not in (fieldnames or [])]
+    if missing:
+        raise ValueError(f"Recording has no raw values ({', '.join(missing)}): {path}")
+
+    raw = np.array([[float(row[name]) for name in raw_names] for row in rows]).reshape(-1, len(CHANNELS))
+    values = profile.apply(raw)
+    for i, name in enumerate(CHANNELS):
+        values[:, i] = np.round(values[:, i], 3 if name == 'Vibrations' else 2)
+    for row, calibrated in zip(rows, values.tolist()):
+        row.update(zip(CHANNELS, calibrated))
+        row['calibration'] = profile.version
+    if 'calibration' not in fieldnames:
+        fieldnames = fieldnames + ['calibration']
+
+    with open(output or path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+    return len(rows)
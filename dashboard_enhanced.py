@@ -1,9 +1,18 @@
+import argparse
+import os
+import csv
+import io
+import math
+import uuid
 import dash
-from dash import dcc, html, Input, Output, dash_table
+from dash import dcc, html, Input, Output, State, dash_table
+from dash.exceptions import PreventUpdate
 import plotly.graph_objs as go
-import pandas as pd
 from datetime import datetime
-from data_gen import RealTimeDataStreamer
+from refresh import PANEL_INTERVALS, REQUEST_BUDGET, VISIBILITY_SCRIPT, RenderThrottle, render_key_store
+from reference_runs import (list_reference_runs, load_reference_run, alignment_key,
+                            DeviationScorer, OVERLAY_CHANNELS)
+from sources import add_source_arguments, create_sensor, sensor_from_args, start_sensor
 
 """
 import logging
@@ -13,10 +22,6 @@ log = logging.getLogger('werkzeug')
 log.setLevel(logging.ERROR)
 """
 
-sensor = RealTimeDataStreamer()
-sensor.start_streaming()
-app = dash.Dash(__name__)
-
 COLORS = {
     'background': '#0f172a',
     'text': '#f1f5f9',
@@ -30,7 +35,46 @@ COLORS = {
     'accent': '#06b6d4'
 }
 
-app.index_string = """
+# Panels rendered through RenderThrottle, each with its own render key store
+THROTTLED_PANELS = ('metrics', 'power', 'voltage', 'sound', 'torque', 'rpm', 'vibrations',
+                    'reference_score', 'comparison', 'data_table')
+
+REFERENCE_COLORS = ['#94a3b8', '#fbbf24', '#34d399', '#f472b6']
+
+def get_reference_runs(paths, align, window=1):
+    """Load selected reference runs at the live points' resolution (envelopes are cached per file)"""
+    runs = []
+    for path in paths or []:
+        try:
+            runs.append(load_reference_run(path, align=align or 'time', window=window))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Reference run error: {e}")
+    return runs
+
+def add_reference_bands(fig, channel, data, runs, align):
+    """Overlay mean ± k·σ envelopes of the reference runs on a live graph"""
+    if not runs:
+        return
+    x = [d['x_value'] for d in data]
+    keys = [alignment_key(d, align) for d in data]
+    for i, run in enumerate(runs):
+        color = REFERENCE_COLORS[i % len(REFERENCE_COLORS)]
+        lower, mean, upper = run.envelope_at(channel, keys)
+        fig.add_trace(go.Scatter(
+            x=x, y=upper, mode='lines', line=dict(width=0, color=color),
+            hoverinfo='skip', showlegend=False
+        ))
+        fig.add_trace(go.Scatter(
+            x=x, y=lower, mode='lines', line=dict(width=0, color=color),
+            fill='tonexty', fillcolor='rgba(148, 163, 184, 0.15)',
+            hoverinfo='skip', showlegend=False
+        ))
+        fig.add_trace(go.Scatter(
+            x=x, y=mean, mode='lines', name=run.name,
+            line=dict(width=1, dash='dash', color=color), showlegend=False
+        ))
+
+INDEX_STRING = """
 <!DOCTYPE html>
 <html>
     <head>
@@ -83,447 +127,658 @@ app.index_string = """
 </html>
 """
 
-app.layout = html.Div([
-    html.Div([
+def build_layout(panel_intervals=PANEL_INTERVALS):
+    """Build the dashboard layout"""
+    return html.Div([
         html.Div([
-            html.H1('🚀 Real-Time Propeller Dashboard', 
-                   style={'margin': 0, 'fontSize': '28px', 'fontWeight': '700'}),
             html.Div([
-                html.Span('🟢 LIVE', style={
-                    'background': 'rgba(16, 185, 129, 0.2)',
-                    'color': '#10b981',
-                    'padding': '5px 15px',
-                    'borderRadius': '20px',
-                    'fontSize': '14px',
-                    'fontWeight': '600',
-                    'marginRight': '10px'
-                }),
-                html.Button('⬇️ Download CSV', id='download-btn', n_clicks=0, 
-                           style={
-                               'background': 'linear-gradient(135deg, #06b6d4 0%, #3b82f6 100%)',
-                               'color': 'white',
-                               'padding': '10px 20px',
-                               'borderRadius': '8px',
-                               'border': 'none',
-                               'cursor': 'pointer',
-                               'fontWeight': '600'
-                           })
-            ], style={'display': 'flex', 'alignItems': 'center'})
-        ], style={'display': 'flex', 'justifyContent': 'space-between', 'alignItems': 'center'})
-    ], style={
-        'padding': '20px 40px',
-        'background': 'rgba(255, 255, 255, 0.05)',
-        'borderBottom': '1px solid rgba(255, 255, 255, 0.1)'
-    }),
-
-    dcc.Download(id='download-csv'),
-
-    html.Div(id='metrics-row', style={
-        'display': 'grid',
-        'gridTemplateColumns': 'repeat(auto-fit, minmax(180px, 1fr))',
-        'gap': '15px',
-        'padding': '20px 40px'
-    }),
-
-    html.Div([
-        html.Div([dcc.Graph(id='power-graph', config={'displayModeBar': False})], style={'padding': '10px'}),
-        html.Div([dcc.Graph(id='voltage-graph', config={'displayModeBar': False})], style={'padding': '10px'}),
-        html.Div([dcc.Graph(id='sound-graph', config={'displayModeBar': False})], style={'padding': '10px'}),
-        html.Div([dcc.Graph(id='torque-graph', config={'displayModeBar': False})], style={'padding': '10px'}),
-        html.Div([dcc.Graph(id='rpm-graph', config={'displayModeBar': False})], style={'padding': '10px'}),
-        html.Div([dcc.Graph(id='vibrations-graph', config={'displayModeBar': False})], style={'padding': '10px'}),
-    ], style={
-        'display': 'grid',
-        'gridTemplateColumns': 'repeat(3, 1fr)',
-        'gap': '0px',
-        'padding': '0 30px'
-    }),
-
-    html.Div([
-        html.H2('📊 Custom Comparison', style={
-            'fontSize': '22px',
-            'fontWeight': '600',
-            'marginBottom': '20px',
-            'color': COLORS['text']
+                html.H1('🚀 Real-Time Propeller Dashboard', 
+                       style={'margin': 0, 'fontSize': '28px', 'fontWeight': '700'}),
+                html.Div([
+                    html.Span('🟢 LIVE', style={
+                        'background': 'rgba(16, 185, 129, 0.2)',
+                        'color': '#10b981',
+                        'padding': '5px 15px',
+                        'borderRadius': '20px',
+                        'fontSize': '14px',
+                        'fontWeight': '600',
+                        'marginRight': '10px'
+                    }),
+                    html.Button('⬇️ Download CSV', id='download-btn', n_clicks=0, 
+                               style={
+                                   'background': 'linear-gradient(135deg, #06b6d4 0%, #3b82f6 100%)',
+                                   'color': 'white',
+                                   'padding': '10px 20px',
+                                   'borderRadius': '8px',
+                                   'border': 'none',
+                                   'cursor': 'pointer',
+                                   'fontWeight': '600'
+                               })
+                ], style={'display': 'flex', 'alignItems': 'center'})
+            ], style={'display': 'flex', 'justifyContent': 'space-between', 'alignItems': 'center'})
+        ], style={
+            'padding': '20px 40px',
+            'background': 'rgba(255, 255, 255, 0.05)',
+            'borderBottom': '1px solid rgba(255, 255, 255, 0.1)'
         }),
-        html.Div([
-            html.Div([
-                html.Label('X-Axis:', style={'marginRight': '10px', 'fontWeight': '500', 'color': COLORS['text']}),
-                dcc.Dropdown(
-                    id='x-axis-dropdown',
-                    options=[
-                        {'label': '⚡ Power', 'value': 'Power'},
-                        {'label': '🔋 Voltage', 'value': 'Voltage'},
-                        {'label': '🔊 Sound', 'value': 'Sound'},
-                        {'label': '⚙️ Torque', 'value': 'Torque'},
-                        {'label': '🔄 RPM', 'value': 'rpm'},
-                        {'label': '〰️ Vibrations', 'value': 'Vibrations'}
-                    ],
-                    value='Power',
-                    style={'width': '200px', 'color': '#000'}
-                )
-            ], style={'display': 'flex', 'alignItems': 'center', 'marginRight': '30px'}),
-            html.Div([
-                html.Label('Y-Axis:', style={'marginRight': '10px', 'fontWeight': '500', 'color': COLORS['text']}),
-                dcc.Dropdown(
-                    id='y-axis-dropdown',
-                    options=[
-                        {'label': '⚡ Power', 'value': 'Power'},
-                        {'label': '🔋 Voltage', 'value': 'Voltage'},
-                        {'label': '🔊 Sound', 'value': 'Sound'},
-                        {'label': '⚙️ Torque', 'value': 'Torque'},
-                        {'label': '🔄 RPM', 'value': 'rpm'},
-                        {'label': '〰️ Vibrations', 'value': 'Vibrations'}
-                    ],
-                    value='Voltage',
-                    style={'width': '200px', 'color': '#000'}
-                )
-            ], style={'display': 'flex', 'alignItems': 'center'})
-        ], style={'display': 'flex', 'marginBottom': '20px'}),
-        dcc.Graph(id='comparison-graph', config={'displayModeBar': False})
-    ], style={
-        'padding': '30px 40px',
-        'background': 'rgba(255, 255, 255, 0.03)',
-        'margin': '20px 40px',
-        'borderRadius': '16px',
-        'border': '1px solid rgba(255, 255, 255, 0.1)'
-    }),
-
-    html.Div([
-        html.H2('📋 Latest Data (Last 10 Readings)', style={
-            'fontSize': '22px',
-            'fontWeight': '600',
-            'marginBottom': '20px',
-            'color': COLORS['text']
+
+        dcc.Download(id='download-csv'),
+
+        html.Div(id='metrics-row', style={
+            'display': 'grid',
+            'gridTemplateColumns': 'repeat(auto-fit, minmax(180px, 1fr))',
+            'gap': '15px',
+            'padding': '20px 40px'
         }),
-        html.Div(id='data-table-container')
-    ], style={
-        'padding': '30px 40px',
-        'background': 'rgba(255, 255, 255, 0.03)',
-        'margin': '20px 40px',
-        'borderRadius': '16px',
-        'border': '1px solid rgba(255, 255, 255, 0.1)'
-    }),
-
-    dcc.Interval(id='interval', interval=1000, n_intervals=0)
-
-], style={'minHeight': '100vh', 'background': 'linear-gradient(135deg, #0f172a 0%, #1e293b 100%)'})
-
-@app.callback(Output('metrics-row', 'children'), Input('interval', 'n_intervals'))
-def update_metrics(n):
-    latest = sensor.get_latest_point()
-    if not latest:
-        return []
-
-    metrics = [
-        ('⚡ Power', latest['Power'], 'W', COLORS['power']),
-        ('🔋 Voltage', latest['Voltage'], 'V', COLORS['voltage']),
-        ('🔊 Sound', latest['Sound'], 'dB', COLORS['sound']),
-        ('⚙️ Torque', latest['Torque'], 'Nm', COLORS['torque']),
-        ('🔄 RPM', latest['rpm'], 'rpm', COLORS['rpm']),
-        ('〰️ Vibrations', latest['Vibrations'], 'Hz', COLORS['vibrations'])
-    ]
-
-    cards = []
-    for icon_name, value, unit, color in metrics:
-        card = html.Div([
-            html.Div(icon_name, style={
+
+        html.Div([
+            html.Label('Reference:', style={'marginRight': '10px', 'fontWeight': '500', 'color': COLORS['text']}),
+            dcc.Dropdown(
+                id='reference-dropdown',
+                options=[{'label': os.path.splitext(os.path.basename(p))[0], 'value': p}
+                         for p in list_reference_runs()],
+                value=[],
+                multi=True,
+                placeholder='Select reference runs',
+                style={'width': '360px', 'color': '#000'}
+            ),
+            dcc.RadioItems(
+                id='reference-align',
+                options=[
+                    {'label': ' Elapsed time', 'value': 'time'},
+                    {'label': ' RPM bin', 'value': 'rpm'}
+                ],
+                value='time',
+                inline=True,
+                style={'marginLeft': '20px', 'color': COLORS['text']},
+                inputStyle={'marginLeft': '10px'}
+            ),
+            html.Div(id='reference-score', style={
+                'marginLeft': '20px',
                 'fontSize': '14px',
-                'color': COLORS['text_secondary'],
-                'marginBottom': '8px'
+                'color': COLORS['text_secondary']
+            })
+        ], style={'display': 'flex', 'alignItems': 'center', 'padding': '0 40px'}),
+
+        html.Div([
+            html.Div([dcc.Graph(id='power-graph', config={'displayModeBar': False})], style={'padding': '10px'}),
+            html.Div([dcc.Graph(id='voltage-graph', config={'displayModeBar': False})], style={'padding': '10px'}),
+            html.Div([dcc.Graph(id='sound-graph', config={'displayModeBar': False})], style={'padding': '10px'}),
+            html.Div([dcc.Graph(id='torque-graph', config={'displayModeBar': False})], style={'padding': '10px'}),
+            html.Div([dcc.Graph(id='rpm-graph', config={'displayModeBar': False})], style={'padding': '10px'}),
+            html.Div([dcc.Graph(id='vibrations-graph', config={'displayModeBar': False})], style={'padding': '10px'}),
+        ], style={
+            'display': 'grid',
+            'gridTemplateColumns': 'repeat(3, 1fr)',
+            'gap': '0px',
+            'padding': '0 30px'
+        }),
+
+        html.Div([
+            html.H2('📊 Custom Comparison', style={
+                'fontSize': '22px',
+                'fontWeight': '600',
+                'marginBottom': '20px',
+                'color': COLORS['text']
             }),
             html.Div([
-                html.Span(f"{value:.1f}", style={
-                    'fontSize': '28px',
-                    'fontWeight': '700',
-                    'color': color
-                }),
-                html.Span(f" {unit}", style={
-                    'fontSize': '16px',
-                    'color': COLORS['text_secondary'],
-                    'marginLeft': '5px'
-                })
-            ])
+                html.Div([
+                    html.Label('X-Axis:', style={'marginRight': '10px', 'fontWeight': '500', 'color': COLORS['text']}),
+                    dcc.Dropdown(
+                        id='x-axis-dropdown',
+                        options=[
+                            {'label': '⚡ Power', 'value': 'Power'},
+                            {'label': '🔋 Voltage', 'value': 'Voltage'},
+                            {'label': '🔊 Sound', 'value': 'Sound'},
+                            {'label': '⚙️ Torque', 'value': 'Torque'},
+                            {'label': '🔄 RPM', 'value': 'rpm'},
+                            {'label': '〰️ Vibrations', 'value': 'Vibrations'}
+                        ],
+                        value='Power',
+                        style={'width': '200px', 'color': '#000'}
+                    )
+                ], style={'display': 'flex', 'alignItems': 'center', 'marginRight': '30px'}),
+                html.Div([
+                    html.Label('Y-Axis:', style={'marginRight': '10px', 'fontWeight': '500', 'color': COLORS['text']}),
+                    dcc.Dropdown(
+                        id='y-axis-dropdown',
+                        options=[
+                            {'label': '⚡ Power', 'value': 'Power'},
+                            {'label': '🔋 Voltage', 'value': 'Voltage'},
+                            {'label': '🔊 Sound', 'value': 'Sound'},
+                            {'label': '⚙️ Torque', 'value': 'Torque'},
+                            {'label': '🔄 RPM', 'value': 'rpm'},
+                            {'label': '〰️ Vibrations', 'value': 'Vibrations'}
+                        ],
+                        value='Voltage',
+                        style={'width': '200px', 'color': '#000'}
+                    )
+                ], style={'display': 'flex', 'alignItems': 'center'})
+            ], style={'display': 'flex', 'marginBottom': '20px'}),
+            dcc.Graph(id='comparison-graph', config={'displayModeBar': False})
         ], style={
-            'background': 'rgba(255, 255, 255, 0.05)',
-            'borderRadius': '12px',
-            'padding': '15px',
+            'padding': '30px 40px',
+            'background': 'rgba(255, 255, 255, 0.03)',
+            'margin': '20px 40px',
+            'borderRadius': '16px',
             'border': '1px solid rgba(255, 255, 255, 0.1)'
-        })
-        cards.append(card)
+        }),
 
-    return cards
+        html.Div([
+            html.H2('📋 Latest Data (Last 10 Readings)', style={
+                'fontSize': '22px',
+                'fontWeight': '600',
+                'marginBottom': '20px',
+                'color': COLORS['text']
+            }),
+            html.Div(id='data-table-container')
+        ], style={
+            'padding': '30px 40px',
+            'background': 'rgba(255, 255, 255, 0.03)',
+            'margin': '20px 40px',
+            'borderRadius': '16px',
+            'border': '1px solid rgba(255, 255, 255, 0.1)'
+        }),
 
-@app.callback(Output('power-graph', 'figure'), Input('interval', 'n_intervals'))
-def update_power(n):
-    data = sensor.get_latest_data(50)
-    if not data:
-        return go.Figure()
+        # Identifies this page load to the shared request budget (see RenderThrottle)
+        dcc.Store(id='client-id', data=uuid.uuid4().hex),
+        # Render key each panel last applied in this browser (see RenderThrottle)
+        *[dcc.Store(id=render_key_store(panel)) for panel in THROTTLED_PANELS],
+        # Clicked by a visibilitychange listener (see VISIBILITY_SCRIPT)
+        html.Button(id='visibility-trigger', n_clicks=0, style={'display': 'none'}),
+        *[dcc.Interval(id=f'interval-{panel}', interval=period, n_intervals=0)
+          for panel, period in panel_intervals.items()]
 
-    x = [d['x_value'] for d in data]
-    y = [d['Power'] for d in data]
-
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(
-        x=x, y=y, 
-        fill='tozeroy',
-        mode='lines',
-        line=dict(color=COLORS['power'], width=2),
-        fillcolor=f"rgba(59, 130, 246, 0.3)"
-    ))
-    fig.update_layout(
-        title='⚡ Power (W)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(255,255,255,0.03)',
-        font=dict(color=COLORS['text']),
-        height=280,
-        margin=dict(l=40, r=20, t=40, b=30),
-        xaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)'),
-        yaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)')
-    )
-    return fig
+    ], style={'minHeight': '100vh', 'background': 'linear-gradient(135deg, #0f172a 0%, #1e293b 100%)'})
 
-@app.callback(Output('voltage-graph', 'figure'), Input('interval', 'n_intervals'))
-def update_voltage(n):
-    data = sensor.get_latest_data(50)
-    if not data:
-        return go.Figure()
 
-    x = [d['x_value'] for d in data]
-    y = [d['Voltage'] for d in data]
-
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(
-        x=x, y=y,
-        mode='lines+markers',
-        line=dict(color=COLORS['voltage'], width=2),
-        marker=dict(size=4, color=COLORS['voltage'])
-    ))
-    fig.update_layout(
-        title='🔋 Voltage (V)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(255,255,255,0.03)',
-        font=dict(color=COLORS['text']),
-        height=280,
-        margin=dict(l=40, r=20, t=40, b=30),
-        xaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)'),
-        yaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)')
-    )
-    return fig
+def register_callbacks(app, sensor, panel_intervals=PANEL_INTERVALS, request_budget=REQUEST_BUDGET):
+    """Wire the live update callbacks to a sensor source, returning their RenderThrottle"""
+    throttle = RenderThrottle(sensor, panel_intervals, request_budget)
 
-@app.callback(Output('sound-graph', 'figure'), Input('interval', 'n_intervals'))
-def update_sound(n):
-    data = sensor.get_latest_data(30)
-    if not data:
-        return go.Figure()
+    # Pause every panel's refresh while the browser tab is hidden
+    app.clientside_callback(
+        VISIBILITY_SCRIPT % len(panel_intervals),
+        [Output(f'interval-{panel}', 'disabled') for panel in panel_intervals],
+        Input('visibility-trigger', 'n_clicks')
+    )
 
-    x = [d['x_value'] for d in data]
-    y = [d['Sound'] for d in data]
-
-    fig = go.Figure()
-    fig.add_trace(go.Bar(
-        x=x, y=y,
-        marker=dict(color=COLORS['sound'])
-    ))
-    fig.update_layout(
-        title='🔊 Sound (dB)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(255,255,255,0.03)',
-        font=dict(color=COLORS['text']),
-        height=280,
-        margin=dict(l=40, r=20, t=40, b=30),
-        xaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)'),
-        yaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)')
+    # Heartbeat: re-spread the request budget over the visible dashboards
+    @app.callback(
+        [Output(f'interval-{panel}', 'interval') for panel in panel_intervals],
+        Input('interval-budget', 'n_intervals'),
+        [State('client-id', 'data')] + [State(f'interval-{panel}', 'interval') for panel in panel_intervals]
     )
-    return fig
-
-@app.callback(Output('torque-graph', 'figure'), Input('interval', 'n_intervals'))
-def update_torque(n):
-    latest = sensor.get_latest_point()
-    if not latest:
-        return go.Figure()
-
-    fig = go.Figure(go.Indicator(
-        mode="gauge+number+delta",
-        value=latest['Torque'],
-        delta={'reference': 300},
-        title={'text': "⚙️ Torque (Nm)"},
-        gauge={
-            'axis': {'range': [None, 500]},
-            'bar': {'color': COLORS['torque']},
-            'steps': [
-                {'range': [0, 200], 'color': 'rgba(139, 92, 246, 0.2)'},
-                {'range': [200, 350], 'color': 'rgba(139, 92, 246, 0.3)'},
-                {'range': [350, 500], 'color': 'rgba(139, 92, 246, 0.4)'}
-            ],
-        }
-    ))
-    fig.update_layout(
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(color=COLORS['text']),
-        height=280,
-        margin=dict(l=20, r=20, t=40, b=20)
+    def update_intervals(n, client_id, *current):
+        intervals = throttle.heartbeat(client_id)
+        periods = [intervals[panel] for panel in panel_intervals]
+        if periods == list(current):
+            raise PreventUpdate
+        return periods
+
+    # Raw samples behind each live point; reference envelopes are built to match
+    window = getattr(sensor, 'aggregate_window', None) or 1
+
+    # One incremental scorer per selected (reference run, alignment), fed every
+    # new live point by the sensor, whether or not a dashboard is watching
+    scorers = {}
+
+    def score(points):
+        for scorer in list(scorers.values()):
+            scorer.update_many(points)
+
+    sensor.add_point_listener(score)
+
+    @app.callback(
+        [Output('metrics-row', 'children'),
+         Output(render_key_store('metrics'), 'data')],
+        Input('interval-metrics', 'n_intervals'),
+        State(render_key_store('metrics'), 'data')
     )
-    return fig
-
-@app.callback(Output('rpm-graph', 'figure'), Input('interval', 'n_intervals'))
-def update_rpm(n):
-    data = sensor.get_latest_data(50)
-    if not data:
-        return go.Figure()
+    @throttle.panel('metrics')
+    def update_metrics(n):
+        latest = sensor.get_latest_point()
+        if not latest:
+            return []
+
+        metrics = [
+            ('⚡ Power', latest['Power'], 'W', COLORS['power']),
+            ('🔋 Voltage', latest['Voltage'], 'V', COLORS['voltage']),
+            ('🔊 Sound', latest['Sound'], 'dB', COLORS['sound']),
+            ('⚙️ Torque', latest['Torque'], 'Nm', COLORS['torque']),
+            ('🔄 RPM', latest['rpm'], 'rpm', COLORS['rpm']),
+            ('〰️ Vibrations', latest['Vibrations'], 'Hz', COLORS['vibrations'])
+        ]
 
-    x = [d['x_value'] for d in data]
-    y = [d['rpm'] for d in data]
-
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(
-        x=x, y=y,
-        mode='lines',
-        line=dict(color=COLORS['rpm'], width=3)
-    ))
-    fig.update_layout(
-        title='🔄 RPM',
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(255,255,255,0.03)',
-        font=dict(color=COLORS['text']),
-        height=280,
-        margin=dict(l=40, r=20, t=40, b=30),
-        xaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)'),
-        yaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)')
+        cards = []
+        for icon_name, value, unit, color in metrics:
+            card = html.Div([
+                html.Div(icon_name, style={
+                    'fontSize': '14px',
+                    'color': COLORS['text_secondary'],
+                    'marginBottom': '8px'
+                }),
+                html.Div([
+                    html.Span(f"{value:.1f}", style={
+                        'fontSize': '28px',
+                        'fontWeight': '700',
+                        'color': color
+                    }),
+                    html.Span(f" {unit}", style={
+                        'fontSize': '16px',
+                        'color': COLORS['text_secondary'],
+                        'marginLeft': '5px'
+                    })
+                ])
+            ], style={
+                'background': 'rgba(255, 255, 255, 0.05)',
+                'borderRadius': '12px',
+                'padding': '15px',
+                'border': '1px solid rgba(255, 255, 255, 0.1)'
+            })
+            cards.append(card)
+
+        return cards
+
+    @app.callback(
+        [Output('power-graph', 'figure'),
+         Output(render_key_store('power'), 'data')],
+        [Input('interval-graphs', 'n_intervals'),
+         Input('reference-dropdown', 'value'),
+         Input('reference-align', 'value')],
+        [State(render_key_store('power'), 'data')]
     )
-    return fig
-
-@app.callback(Output('vibrations-graph', 'figure'), Input('interval', 'n_intervals'))
-def update_vibrations(n):
-    data = sensor.get_latest_data(50)
-    if not data:
-        return go.Figure()
+    @throttle.panel('power')
+    def update_power(n, reference_paths, align):
+        data = sensor.get_latest_data(50)
+        if not data:
+            return go.Figure()
+
+        x = [d['x_value'] for d in data]
+        y = [d['Power'] for d in data]
+
+        fig = go.Figure()
+        add_reference_bands(fig, 'Power', data, get_reference_runs(reference_paths, align, window), align)
+        fig.add_trace(go.Scatter(
+            x=x, y=y, 
+            fill='tozeroy',
+            mode='lines',
+            line=dict(color=COLORS['power'], width=2),
+            fillcolor=f"rgba(59, 130, 246, 0.3)"
+        ))
+        fig.update_layout(
+            title='⚡ Power (W)',
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(255,255,255,0.03)',
+            font=dict(color=COLORS['text']),
+            height=280,
+            margin=dict(l=40, r=20, t=40, b=30),
+            xaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)'),
+            yaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)')
+        )
+        return fig
 
-    x = [d['x_value'] for d in data]
-    y = [d['Vibrations'] for d in data]
-
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(
-        x=x, y=y,
-        mode='markers',
-        marker=dict(
-            size=8,
-            color=y,
-            colorscale='Pinkyl',
-            showscale=True,
-            colorbar=dict(title="Hz")
+    @app.callback(
+        [Output('voltage-graph', 'figure'),
+         Output(render_key_store('voltage'), 'data')],
+        Input('interval-graphs', 'n_intervals'),
+        State(render_key_store('voltage'), 'data')
+    )
+    @throttle.panel('voltage')
+    def update_voltage(n):
+        data = sensor.get_latest_data(50)
+        if not data:
+            return go.Figure()
+
+        x = [d['x_value'] for d in data]
+        y = [d['Voltage'] for d in data]
+
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(
+            x=x, y=y,
+            mode='lines+markers',
+            line=dict(color=COLORS['voltage'], width=2),
+            marker=dict(size=4, color=COLORS['voltage'])
+        ))
+        fig.update_layout(
+            title='🔋 Voltage (V)',
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(255,255,255,0.03)',
+            font=dict(color=COLORS['text']),
+            height=280,
+            margin=dict(l=40, r=20, t=40, b=30),
+            xaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)'),
+            yaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)')
         )
-    ))
-    fig.update_layout(
-        title='〰️ Vibrations (Hz)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(255,255,255,0.03)',
-        font=dict(color=COLORS['text']),
-        height=280,
-        margin=dict(l=40, r=20, t=40, b=30),
-        xaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)'),
-        yaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)')
+        return fig
+
+    @app.callback(
+        [Output('sound-graph', 'figure'),
+         Output(render_key_store('sound'), 'data')],
+        Input('interval-graphs', 'n_intervals'),
+        State(render_key_store('sound'), 'data')
     )
-    return fig
-
-# Comparison Graph
-@app.callback(
-    Output('comparison-graph', 'figure'),
-    [Input('interval', 'n_intervals'),
-     Input('x-axis-dropdown', 'value'),
-     Input('y-axis-dropdown', 'value')]
-)
-def update_comparison(n, x_col, y_col):
-    data = sensor.get_latest_data()
-
-    # Handle None values
-    if not data or x_col is None or y_col is None:
-        return go.Figure()
-
-    x_data = [d[x_col] for d in data]
-    y_data = [d[y_col] for d in data]
-
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(
-        x=x_data,
-        y=y_data,
-        mode='markers',
-        marker=dict(
-            size=10,
-            color=COLORS['accent'],
-            opacity=0.7,
-            line=dict(width=1, color='white')
-        ),
-        text=[f"Point {d['x_value']}" for d in data],
-        hovertemplate=f'{x_col}: %{{x}}<br>{y_col}: %{{y}}<extra></extra>'
-    ))
-    fig.update_layout(
-        title=f'{x_col} vs {y_col}',
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(255,255,255,0.03)',
-        font=dict(color=COLORS['text']),
-        height=400,
-        margin=dict(l=60, r=40, t=60, b=60),
-        xaxis=dict(title=x_col, showgrid=True, gridcolor='rgba(255,255,255,0.1)'),
-        yaxis=dict(title=y_col, showgrid=True, gridcolor='rgba(255,255,255,0.1)')
+    @throttle.panel('sound')
+    def update_sound(n):
+        data = sensor.get_latest_data(30)
+        if not data:
+            return go.Figure()
+
+        x = [d['x_value'] for d in data]
+        y = [d['Sound'] for d in data]
+
+        fig = go.Figure()
+        fig.add_trace(go.Bar(
+            x=x, y=y,
+            marker=dict(color=COLORS['sound'])
+        ))
+        fig.update_layout(
+            title='🔊 Sound (dB)',
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(255,255,255,0.03)',
+            font=dict(color=COLORS['text']),
+            height=280,
+            margin=dict(l=40, r=20, t=40, b=30),
+            xaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)'),
+            yaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)')
+        )
+        return fig
+
+    @app.callback(
+        [Output('torque-graph', 'figure'),
+         Output(render_key_store('torque'), 'data')],
+        [Input('interval-gauge', 'n_intervals'),
+         Input('reference-dropdown', 'value'),
+         Input('reference-align', 'value')],
+        [State(render_key_store('torque'), 'data')]
     )
-    return fig
-
-@app.callback(Output('data-table-container', 'children'), Input('interval', 'n_intervals'))
-def update_data_table(n):
-    data = sensor.get_latest_data(10)
-    if not data:
-        return html.Div("No data available", style={'color': COLORS['text_secondary']})
-
-    df = pd.DataFrame(data)
-
-    return dash_table.DataTable(
-        data=df.to_dict('records'),
-        columns=[{'name': i, 'id': i} for i in df.columns],
-        style_cell={
-            'textAlign': 'center',
-            'padding': '10px',
-            'backgroundColor': 'rgba(255, 255, 255, 0.05)',
-            'color': COLORS['text'],
-            'border': '1px solid rgba(255, 255, 255, 0.1)'
-        },
-        style_header={
-            'backgroundColor': 'rgba(255, 255, 255, 0.1)',
-            'fontWeight': 'bold',
-            'border': '1px solid rgba(255, 255, 255, 0.2)'
-        },
-        style_data_conditional=[
-            {
-                'if': {'row_index': 'odd'},
-                'backgroundColor': 'rgba(255, 255, 255, 0.02)'
-            }
+    @throttle.panel('torque')
+    def update_torque(n, reference_paths, align):
+        latest = sensor.get_latest_point()
+        if not latest:
+            return go.Figure()
+
+        # Delta against the first selected reference run, else the fixed target
+        reference = 300
+        steps = [
+            {'range': [0, 200], 'color': 'rgba(139, 92, 246, 0.2)'},
+            {'range': [200, 350], 'color': 'rgba(139, 92, 246, 0.3)'},
+            {'range': [350, 500], 'color': 'rgba(139, 92, 246, 0.4)'}
         ]
+        runs = get_reference_runs(reference_paths, align, window)
+        if runs:
+            lower, mean, upper = runs[0].envelope_at('Torque', [alignment_key(latest, align)])
+            # No envelope outside the reference run's range
+            if not math.isnan(mean[0]):
+                reference = float(mean[0])
+                steps.append({'range': [float(lower[0]), float(upper[0])], 'color': 'rgba(148, 163, 184, 0.4)'})
+
+        fig = go.Figure(go.Indicator(
+            mode="gauge+number+delta",
+            value=latest['Torque'],
+            delta={'reference': reference},
+            title={'text': "⚙️ Torque (Nm)"},
+            gauge={
+                'axis': {'range': [None, 500]},
+                'bar': {'color': COLORS['torque']},
+                'steps': steps,
+            }
+        ))
+        fig.update_layout(
+            paper_bgcolor='rgba(0,0,0,0)',
+            font=dict(color=COLORS['text']),
+            height=280,
+            margin=dict(l=20, r=20, t=40, b=20)
+        )
+        return fig
+
+    @app.callback(
+        [Output('rpm-graph', 'figure'),
+         Output(render_key_store('rpm'), 'data')],
+        [Input('interval-graphs', 'n_intervals'),
+         Input('reference-dropdown', 'value'),
+         Input('reference-align', 'value')],
+        [State(render_key_store('rpm'), 'data')]
     )
+    @throttle.panel('rpm')
+    def update_rpm(n, reference_paths, align):
+        data = sensor.get_latest_data(50)
+        if not data:
+            return go.Figure()
+
+        x = [d['x_value'] for d in data]
+        y = [d['rpm'] for d in data]
+
+        fig = go.Figure()
+        add_reference_bands(fig, 'rpm', data, get_reference_runs(reference_paths, align, window), align)
+        fig.add_trace(go.Scatter(
+            x=x, y=y,
+            mode='lines',
+            line=dict(color=COLORS['rpm'], width=3)
+        ))
+        fig.update_layout(
+            title='🔄 RPM',
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(255,255,255,0.03)',
+            font=dict(color=COLORS['text']),
+            height=280,
+            margin=dict(l=40, r=20, t=40, b=30),
+            xaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)'),
+            yaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)')
+        )
+        return fig
+
+    @app.callback(
+        [Output('vibrations-graph', 'figure'),
+         Output(render_key_store('vibrations'), 'data')],
+        [Input('interval-graphs', 'n_intervals'),
+         Input('reference-dropdown', 'value'),
+         Input('reference-align', 'value')],
+        [State(render_key_store('vibrations'), 'data')]
+    )
+    @throttle.panel('vibrations')
+    def update_vibrations(n, reference_paths, align):
+        data = sensor.get_latest_data(50)
+        if not data:
+            return go.Figure()
+
+        x = [d['x_value'] for d in data]
+        y = [d['Vibrations'] for d in data]
+
+        fig = go.Figure()
+        add_reference_bands(fig, 'Vibrations', data, get_reference_runs(reference_paths, align, window), align)
+        fig.add_trace(go.Scatter(
+            x=x, y=y,
+            mode='markers',
+            marker=dict(
+                size=8,
+                color=y,
+                colorscale='Pinkyl',
+                showscale=True,
+                colorbar=dict(title="Hz")
+            )
+        ))
+        fig.update_layout(
+            title='〰️ Vibrations (Hz)',
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(255,255,255,0.03)',
+            font=dict(color=COLORS['text']),
+            height=280,
+            margin=dict(l=40, r=20, t=40, b=30),
+            xaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)'),
+            yaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)')
+        )
+        return fig
+
+    # Reference Deviation Score
+    @app.callback(
+        [Output('reference-score', 'children'),
+         Output(render_key_store('reference_score'), 'data')],
+        [Input('interval-reference', 'n_intervals'),
+         Input('reference-dropdown', 'value'),
+         Input('reference-align', 'value')],
+        [State(render_key_store('reference_score'), 'data')]
+    )
+    @throttle.panel('reference_score')
+    def update_reference_score(n, reference_paths, align):
+        runs = get_reference_runs(reference_paths, align, window)
+        selected = {(run.path, run.align) for run in runs}
+        for key in [key for key in scorers if key not in selected]:
+            del scorers[key]
+        if not runs:
+            return ''
+
+        lines = []
+        for run in runs:
+            key = (run.path, run.align)
+            scorer = scorers.get(key)
+            if scorer is None or scorer.reference is not run:
+                # Scores the live points from now on
+                scorer = scorers[key] = DeviationScorer(run)
+            summary = ', '.join(f"{c} {scorer.mean_abs(c):.1f}σ" for c in OVERLAY_CHANNELS)
+            lines.append(html.Div(f"{run.name}: {summary} ({scorer.count} points)"))
+        return lines
+
+    # Comparison Graph
+    @app.callback(
+        [Output('comparison-graph', 'figure'),
+         Output(render_key_store('comparison'), 'data')],
+        [Input('interval-comparison', 'n_intervals'),
+         Input('x-axis-dropdown', 'value'),
+         Input('y-axis-dropdown', 'value')],
+        [State(render_key_store('comparison'), 'data')]
+    )
+    @throttle.panel('comparison')
+    def update_comparison(n, x_col, y_col):
+        data = sensor.get_latest_data()
+
+        # Handle None values
+        if not data or x_col is None or y_col is None:
+            return go.Figure()
+
+        x_data = [d[x_col] for d in data]
+        y_data = [d[y_col] for d in data]
+
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(
+            x=x_data,
+            y=y_data,
+            mode='markers',
+            marker=dict(
+                size=10,
+                color=COLORS['accent'],
+                opacity=0.7,
+                line=dict(width=1, color='white')
+            ),
+            text=[f"Point {d['x_value']}" for d in data],
+            hovertemplate=f'{x_col}: %{{x}}<br>{y_col}: %{{y}}<extra></extra>'
+        ))
+        fig.update_layout(
+            title=f'{x_col} vs {y_col}',
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(255,255,255,0.03)',
+            font=dict(color=COLORS['text']),
+            height=400,
+            margin=dict(l=60, r=40, t=60, b=60),
+            xaxis=dict(title=x_col, showgrid=True, gridcolor='rgba(255,255,255,0.1)'),
+            yaxis=dict(title=y_col, showgrid=True, gridcolor='rgba(255,255,255,0.1)')
+        )
+        return fig
 
-# CSV Download
-@app.callback(
-    Output('download-csv', 'data'),
-    Input('download-btn', 'n_clicks'),
-    prevent_initial_call=True
-)
-def download_csv(n_clicks):
-    if n_clicks is None or n_clicks == 0:
-        return None
-
-    data = sensor.get_latest_data()
-    if not data:
-        return None
-
-    df = pd.DataFrame(data)
-    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    filename = f"propeller_data_{timestamp}.csv"
-
-    return dcc.send_data_frame(df.to_csv, filename, index=False)
+    @app.callback(
+        [Output('data-table-container', 'children'),
+         Output(render_key_store('data_table'), 'data')],
+        Input('interval-table', 'n_intervals'),
+        State(render_key_store('data_table'), 'data')
+    )
+    @throttle.panel('data_table')
+    def update_data_table(n):
+        data = sensor.get_latest_data(10)
+        if not data:
+            return html.Div("No data available", style={'color': COLORS['text_secondary']})
+
+        return dash_table.DataTable(
+            data=data,
+            columns=[{'name': i, 'id': i} for i in data[0]],
+            style_cell={
+                'textAlign': 'center',
+                'padding': '10px',
+                'backgroundColor': 'rgba(255, 255, 255, 0.05)',
+                'color': COLORS['text'],
+                'border': '1px solid rgba(255, 255, 255, 0.1)'
+            },
+            style_header={
+                'backgroundColor': 'rgba(255, 255, 255, 0.1)',
+                'fontWeight': 'bold',
+                'border': '1px solid rgba(255, 255, 255, 0.2)'
+            },
+            style_data_conditional=[
+                {
+                    'if': {'row_index': 'odd'},
+                    'backgroundColor': 'rgba(255, 255, 255, 0.02)'
+                }
+            ]
+        )
 
+    # CSV Download
+    @app.callback(
+        Output('download-csv', 'data'),
+        Input('download-btn', 'n_clicks'),
+        prevent_initial_call=True
+    )
+    def download_csv(n_clicks):
+        if n_clicks is None or n_clicks == 0:
+            return None
+
+        data = sensor.get_latest_data()
+        if not data:
+            return None
+
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=list(data[0]), extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(data)
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        filename = f"propeller_data_{timestamp}.csv"
+
+        return dcc.send_string(buffer.getvalue(), filename)
+
+    return throttle
+
+
+def create_app(sensor=None, source=None, panel_intervals=None, request_budget=REQUEST_BUDGET,
+               **source_options):
+    """
+    Build the Dash app around a sensor source
+
+    If no sensor is given one is created from source (see sources.py)
+    and started. Nothing is created or started at import time.
+    panel_intervals overrides refresh periods (ms) from PANEL_INTERVALS,
+    e.g. {'gauge': 100, 'table': 2000}. All visible dashboards together
+    send at most request_budget callback requests per second; their
+    intervals are stretched evenly to fit (None disables the budget).
+    """
+    if sensor is None:
+        sensor = create_sensor(source, **source_options)
+        start_sensor(sensor)
+    intervals = dict(PANEL_INTERVALS, **(panel_intervals or {}))
+    app = dash.Dash(__name__)
+    app.index_string = INDEX_STRING
+    throttle = register_callbacks(app, sensor, intervals, request_budget)
+    # Built per page load, so reference runs saved since startup are listed
+    app.layout = lambda: build_layout(throttle.client_intervals())
+    return app
 
 if __name__ == '__main__':
-    print("✅ Data streaming started!")
+    parser = argparse.ArgumentParser(description="Real-Time Propeller Dashboard")
+    add_source_arguments(parser)
+    parser.add_argument('--dash-port', type=int, default=8050, help="dashboard HTTP port")
+    args = parser.parse_args()
+
+    sensor = sensor_from_args(args)
+    start_sensor(sensor)
+    app = create_app(sensor)
     print("🚀 Dashboard starting...")
-    print("📊 Open: http://127.0.0.1:8050")
+    print(f"📊 Open: http://127.0.0.1:{args.dash_port}")
     print("🔇 Terminal logging suppressed (clean output)")
-    app.run(debug=False, port=8050)
+    app.run(debug=False, port=args.dash_port)
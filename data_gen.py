@@ -8,6 +8,8 @@ class RealTimeDataStreamer:
         self.data_buffer = deque(maxlen=100)
         self.running = False
         self.thread = None
+        # Called with each batch of new points
+        self.listeners = []
 
         self.x = 0
         self.power = 200
@@ -47,6 +49,8 @@ class RealTimeDataStreamer:
             }
 
             self.data_buffer.append(data_point)
+            for listener in self.listeners:
+                listener([data_point])
             time.sleep(1)
 
     def get_latest_data(self, num_points=50):
@@ -60,3 +64,13 @@ class RealTimeDataStreamer:
         if self.data_buffer:
             return self.data_buffer[-1]
         return None
+
+    def add_point_listener(self, callback):
+        """Call callback(points) with every new data point"""
+        self.listeners.append(callback)
+
+    def stop_streaming(self):
+        """Stop generating data"""
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=2)
@@ -0,0 +1,84 @@
+import csv
+import time
+import threading
+from collections import deque
+
+class ReplayStreamer:
+    def __init__(self, path, rate=1.0, loop=False):
+        """
+        Replays a recorded run (dashboard CSV export or acquire.py output)
+
+        Samples are emitted at one per second divided by rate, so rate=10
+        replays a run ten times faster than it was recorded.
+        """
+        self.path = path
+        self.rate = rate
+        self.loop = loop
+        self.data_buffer = deque(maxlen=1000)
+        self.running = False
+        self.thread = None
+        # Called with each batch of new points
+        self.listeners = []
+        self.x = 0
+        self.rows = self._load(path)
+
+    @staticmethod
+    def _load(path):
+        """Read the recorded samples, converting numeric columns to float"""
+        rows = []
+        with open(path, newline='') as f:
+            for row in csv.DictReader(f):
+                point = {}
+                for key, value in row.items():
+                    try:
+                        point[key] = float(value)
+                    except (TypeError, ValueError):
+                        point[key] = value
+                rows.append(point)
+        return rows
+
+    def start_streaming(self):
+        """Start replaying data"""
+        self.running = True
+        self.thread = threading.Thread(target=self._replay_loop)
+        self.thread.daemon = True
+        self.thread.start()
+        print(f"✅ Replaying {self.path}")
+
+    def _replay_loop(self):
+        """Emit the recorded samples in order"""
+        while self.running:
+            for row in self.rows:
+                if not self.running:
+                    return
+                self.x += 1
+                data_point = dict(row)
+                data_point['x_value'] = self.x
+                self.data_buffer.append(data_point)
+                for listener in self.listeners:
+                    listener([data_point])
+                time.sleep(1 / self.rate)
+            if not self.loop:
+                self.running = False
+
+    def get_latest_data(self, num_points=50):
+        """Get recent data points"""
+        if not self.data_buffer:
+            return []
+        return list(self.data_buffer)[-num_points:]
+
+    def get_latest_point(self):
+        """Get most recent point"""
+        if self.data_buffer:
+            return self.data_buffer[-1]
+        return None
+
+    def add_point_listener(self, callback):
+        """Call callback(points) with every new data point"""
+        self.listeners.append(callback)
+
+    def stop_streaming(self):
+        """Stop replaying"""
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=2)
@@ -0,0 +1,162 @@
+# Propeller Signal Simulator & Fake Serial Device
+import os
+import time
+import threading
+from collections import deque
+import numpy as np
+from arduino_sensor_reader import BINARY_SYNC, BINARY_FRAME
+
+# Torque coefficient: tau = K_TORQUE * omega^2 (2.9 Nm / 1830 W at 6000 rpm)
+K_TORQUE = 7.35e-6
+
+
+class PropellerSignalModel:
+    def __init__(self, rate_hz=1000, seed=0, base_rpm=4000, blades=2,
+                 load_steps=None, faults=None, noise=1.0):
+        """
+        Seeded, deterministic propeller signals in CSV column order
+
+        rate_hz      samples per second of simulated time
+        load_steps   [(t_seconds, rpm), ...] setpoint changes
+        faults       [(t_start, t_end, kind), ...] with kind one of
+                     'imbalance' (1x vibration grows), 'spike' (sensor
+                     glitches on Power) or 'dropout' (Torque reads 0)
+        noise        sensor noise scale (0 disables noise)
+
+        The same seed, rate and settings always give the same samples.
+        """
+        self.rate_hz = rate_hz
+        self.seed = seed
+        self.base_rpm = base_rpm
+        self.blades = blades
+        self.load_steps = sorted(load_steps or [])
+        self.faults = faults or []
+        self.noise = noise
+        self.rng = np.random.default_rng(seed)
+        # Separate stream so fault injection does not shift the noise samples
+        self.fault_rng = np.random.default_rng(seed + 1)
+        self.n = 0
+        self.rpm = float(base_rpm)
+        self.phase = 0.0
+
+    def generate(self, count):
+        """Return the next count samples, shape (count, 6)"""
+        t = (self.n + np.arange(count)) / self.rate_hz
+        self.n += count
+
+        # Setpoint with load steps, followed by a first-order motor response
+        setpoint = np.full(count, float(self.base_rpm))
+        for step_t, step_rpm in self.load_steps:
+            setpoint[t >= step_t] = step_rpm
+        decay = np.exp(-1 / (0.3 * self.rate_hz))  # 0.3 s time constant
+        rpm = np.empty(count)
+        current = self.rpm
+        start = 0
+        for end in list(np.flatnonzero(np.diff(setpoint)) + 1) + [count]:
+            k = np.arange(1, end - start + 1)
+            rpm[start:end] = setpoint[start] + (current - setpoint[start]) * decay ** k
+            current = rpm[end - 1]
+            start = end
+        self.rpm = current
+
+        omega = rpm * 2 * np.pi / 60
+        phase = self.phase + np.cumsum(omega / self.rate_hz)
+        self.phase = float(phase[-1]) % (2 * np.pi)
+
+        torque = K_TORQUE * omega ** 2
+        power = torque * omega
+        voltage = 22.2 - 0.002 * power  # 6S pack sagging under load
+        sound = 20 + 25 * rpm / 6000 + 2 * np.abs(np.sin(self.blades * phase))
+        imbalance = np.full(count, 0.3)
+        for t0, t1, kind in self.faults:
+            if kind == 'imbalance':
+                imbalance[(t >= t0) & (t < t1)] = 1.5
+        vibration = 1.0 + imbalance * np.sin(phase) + 0.2 * np.sin(self.blades * phase)
+
+        samples = np.column_stack([power, voltage, sound, torque, rpm, vibration])
+        if self.noise:
+            scale = np.array([5.0, 0.05, 0.5, 0.02, 10.0, 0.05]) * self.noise
+            samples += self.rng.normal(0, 1, samples.shape) * scale
+
+        glitch = self.fault_rng.random(count) < 0.01
+        for t0, t1, kind in self.faults:
+            window = (t >= t0) & (t < t1)
+            if kind == 'spike':
+                samples[window & glitch, 0] *= 3
+            elif kind == 'dropout':
+                samples[window, 3] = 0.0
+
+        samples[:, 5] = np.clip(samples[:, 5], 0, None)
+        return samples
+
+
+def encode_csv(samples):
+    """Encode samples as Arduino CSV lines"""
+    lines = [','.join(f"{v:.3f}" for v in row) for row in samples.tolist()]
+    return ('\n'.join(lines) + '\n').encode()
+
+
+def encode_binary(samples):
+    """Encode samples as binary frames (see arduino_sensor_reader.BINARY_FRAME)"""
+    frames = np.zeros(len(samples), dtype=BINARY_FRAME)
+    frames['sync'] = np.frombuffer(BINARY_SYNC, dtype='u1')
+    payload = samples.astype('<f4').view('u1').reshape(len(samples), 24)
+    frames['payload'] = payload
+    frames['checksum'] = payload.sum(axis=1, dtype=np.uint32) & 0xFF
+    return frames.tobytes()
+
+
+class FakeSerialDevice:
+    def __init__(self, model=None, data_format='csv', chunk_interval=0.01):
+        """
+        Pseudo-terminal pair that behaves like an Arduino on a serial port
+
+        Point ArduinoSensorReader at .port to test the full serial path
+        without hardware (Linux/macOS only). Samples are written in chunks
+        every chunk_interval seconds, paced to the model's rate.
+        """
+        import pty
+        import tty
+        self.model = model or PropellerSignalModel()
+        self.data_format = data_format
+        self.chunk_interval = chunk_interval
+        self.master_fd, self.slave_fd = pty.openpty()
+        tty.setraw(self.slave_fd)
+        self.port = os.ttyname(self.slave_fd)
+        self.running = False
+        self.thread = None
+        self.sent = 0
+        # (monotonic time, total samples sent) after each write, for latency
+        self.write_log = deque(maxlen=100000)
+
+    def start(self):
+        """Start writing samples"""
+        self.running = True
+        self.thread = threading.Thread(target=self._write_loop)
+        self.thread.daemon = True
+        self.thread.start()
+        print(f"🔌 Fake serial device on {self.port} ({self.model.rate_hz} Hz, {self.data_format})")
+
+    def _write_loop(self):
+        """Write every sample that is due, then sleep until the next chunk"""
+        encode = encode_binary if self.data_format == 'binary' else encode_csv
+        start = time.monotonic()
+        while self.running:
+            due = int((time.monotonic() - start) * self.model.rate_hz) - self.sent
+            if due > 0:
+                data = encode(self.model.generate(due))
+                view = memoryview(data)
+                while view and self.running:
+                    # Blocks while the reader lags, like a full UART buffer
+                    view = view[os.write(self.master_fd, view):]
+                self.sent += due
+                self.write_log.append((time.monotonic(), self.sent))
+            time.sleep(self.chunk_interval)
+
+    def stop(self):
+        """Stop writing and close the pty pair"""
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=2)
+        os.close(self.master_fd)
+        os.close(self.slave_fd)
@@ -0,0 +1,202 @@
+# Reference Run Envelopes
+import os
+import csv
+import math
+import numpy as np
+
+REFERENCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'reference_runs')
+
+# Channels that get a reference envelope overlay on the dashboard
+OVERLAY_CHANNELS = ('Power', 'Torque', 'rpm', 'Vibrations')
+
+# Envelope cache: (path, align, bin_width, k, window) -> (mtime, ReferenceRun)
+_cache = {}
+
+
+class ReferenceRun:
+    def __init__(self, path, align='time', bin_width=None, k=2.0, window=1):
+        """
+        Stored known-good run with precomputed mean ± k·σ envelopes
+
+        The run is a CSV as written by the dashboard's "Download CSV"
+        button (x_value,Power,Voltage,Sound,Torque,rpm,Vibrations).
+
+        align='time' bins samples by their sample number counted from the
+        start of acquisition (x_value, or 'sample' for aggregated exports),
+        the same origin live samples use, so a run saved from the middle of
+        an acquisition lines up with that stretch only. align='rpm' bins
+        samples by their RPM value. Outside the run's range there is no
+        envelope (NaN).
+
+        window is the number of raw samples behind each live point (the
+        reader's aggregate_window). Raw or finer-grained runs are averaged
+        to that resolution first, so the envelope spreads match the live
+        points they are compared with.
+        """
+        self.path = path
+        self.name = os.path.splitext(os.path.basename(path))[0]
+        self.align = align
+        self.window = window
+        self.bin_width = bin_width or (5 * window if align == 'time' else 250)
+        self.k = k
+
+        columns = self._load(path)
+        resolution = int(columns['samples'][0]) if 'samples' in columns else 1
+        if window % resolution:
+            raise ValueError(f"Reference run has {resolution}-sample summaries, "
+                             f"live points have {window}: {path}")
+        if window > resolution:
+            columns = self._resample(columns, window, window // resolution)
+        if align == 'time':
+            # Aggregated exports are timed by the raw sample number of each window
+            keys = columns.get('sample', columns['x_value']) - 1
+        else:
+            keys = columns['rpm']
+
+        # Bin every sample once, then reduce each channel per bin
+        bins = np.floor(keys / self.bin_width).astype(int)
+        self.first_bin = int(bins.min())
+        bins -= self.first_bin
+        n_bins = int(bins.max()) + 1
+        counts = np.bincount(bins, minlength=n_bins)
+        filled = counts > 0
+
+        self.mean = {}
+        self.std = {}
+        for channel in OVERLAY_CHANNELS:
+            values = columns[channel]
+            sums = np.bincount(bins, weights=values, minlength=n_bins)
+            sq_sums = np.bincount(bins, weights=values * values, minlength=n_bins)
+            mean = np.divide(sums, counts, out=np.zeros(n_bins), where=filled)
+            var = np.divide(sq_sums, counts, out=np.zeros(n_bins), where=filled) - mean * mean
+            std = np.sqrt(np.clip(var, 0.0, None))
+            # Empty bins borrow the nearest filled bin so lookups never hit gaps
+            idx = np.where(filled, np.arange(n_bins), 0)
+            np.maximum.accumulate(idx, out=idx)
+            self.mean[channel] = mean[idx]
+            self.std[channel] = std[idx]
+        self.n_bins = n_bins
+
+    @staticmethod
+    def _load(path):
+        """Read a stored run into one float array per column"""
+        with open(path, newline='') as f:
+            rows = list(csv.DictReader(f))
+        if not rows:
+            raise ValueError(f"Reference run is empty: {path}")
+        names = ('x_value',) + OVERLAY_CHANNELS + tuple(n for n in ('sample', 'samples') if n in rows[0])
+        return {name: np.array([float(row[name]) for row in rows]) for name in names}
+
+    @staticmethod
+    def _resample(columns, window, rows_per_window):
+        """Average the run over the same window-aligned blocks an aggregating reader uses"""
+        samples = columns.get('sample', columns['x_value']) - 1
+        group = np.floor(samples / window).astype(int)
+        first = group.min()
+        group -= first
+        counts = np.bincount(group)
+        # Partial windows at the edges of the run have no live counterpart
+        complete = counts == rows_per_window
+        if not complete.any():
+            raise ValueError(f"Reference run is shorter than one live window ({window} samples)")
+        numbers = np.flatnonzero(complete) + first
+        resampled = {
+            'x_value': numbers + 1.0,
+            'sample': numbers * window + (window - 1) / 2 + 1,
+        }
+        for channel in OVERLAY_CHANNELS:
+            sums = np.bincount(group, weights=columns[channel])
+            resampled[channel] = sums[complete] / rows_per_window
+        return resampled
+
+    def bin_index(self, keys):
+        """Map elapsed samples or RPM values to envelope bin indices, -1 outside the run"""
+        keys = np.asarray(keys, dtype=float)
+        bins = np.floor(keys / self.bin_width) - self.first_bin
+        inside = (bins >= 0) & (bins < self.n_bins)
+        return np.where(inside, bins, -1).astype(int)
+
+    def envelope_at(self, channel, keys):
+        """Return (lower, mean, upper) arrays of the envelope at the given keys (NaN outside the run)"""
+        idx = self.bin_index(keys)
+        inside = idx >= 0
+        mean = np.where(inside, self.mean[channel][idx], np.nan)
+        band = np.where(inside, self.k * self.std[channel][idx], np.nan)
+        return mean - band, mean, mean + band
+
+
+class DeviationScorer:
+    def __init__(self, reference):
+        """
+        Incremental deviation of a live run from a reference envelope
+
+        Feed it every new live point (e.g. as a sensor point listener); each
+        is scored once against the precomputed envelope, independent of how
+        often the score is displayed.
+        """
+        self.reference = reference
+        self.last_x = None
+        self.count = 0
+        self.abs_sum = {channel: 0.0 for channel in OVERLAY_CHANNELS}
+        self.latest = {channel: 0.0 for channel in OVERLAY_CHANNELS}
+
+    def update(self, point):
+        """Score a single live sample in σ units (samples outside the run are not scored)"""
+        self.last_x = point['x_value']
+        idx = int(self.reference.bin_index(alignment_key(point, self.reference.align)))
+        if idx < 0:
+            return
+        for channel in OVERLAY_CHANNELS:
+            mean = self.reference.mean[channel][idx]
+            std = self.reference.std[channel][idx]
+            z = (point[channel] - mean) / std if std > 0 else 0.0
+            self.latest[channel] = z
+            self.abs_sum[channel] += abs(z)
+        self.count += 1
+
+    def update_many(self, points):
+        """Score only the samples not seen by a previous call"""
+        for point in points:
+            if self.last_x is None or point['x_value'] > self.last_x:
+                self.update(point)
+
+    def mean_abs(self, channel):
+        """Average absolute deviation (σ) of a channel over the live run"""
+        if not self.count:
+            return math.nan
+        return self.abs_sum[channel] / self.count
+
+
+def alignment_key(point, align):
+    """Alignment key of a live sample (samples since acquisition start, or RPM)
+
+    Aggregated summaries carry the raw sample number of their window centre
+    in 'sample'; plain samples are numbered by x_value from 1.
+    """
+    if align == 'rpm':
+        return point['rpm']
+    return point.get('sample', point['x_value']) - 1
+
+
+def list_reference_runs(directory=REFERENCE_DIR):
+    """List stored reference run CSV files"""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if name.lower().endswith('.csv')
+    )
+
+
+def load_reference_run(path, align='time', bin_width=None, k=2.0, window=1):
+    """Load a reference run, reusing the cached envelopes while the file is unchanged"""
+    key = (path, align, bin_width, k, window)
+    mtime = os.path.getmtime(path)
+    cached = _cache.get(key)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    # A changed file replaces its entry, so edits do not accumulate runs
+    run = ReferenceRun(path, align=align, bin_width=bin_width, k=k, window=window)
+    _cache[key] = (mtime, run)
+    return run
@@ -0,0 +1,156 @@
+# Adaptive Dashboard Refresh
+import functools
+import threading
+import time
+from dash.exceptions import PreventUpdate
+
+# Refresh period per panel group (ms); each group has its own dcc.Interval
+PANEL_INTERVALS = {
+    'metrics': 1000,
+    'graphs': 1000,
+    'gauge': 1000,
+    'comparison': 1000,
+    'table': 2000,
+    'reference': 2000,
+    # Heartbeat that fetches this dashboard's share of REQUEST_BUDGET
+    'budget': 5000,
+}
+
+# Server callbacks fired by each interval group on every tick
+PANEL_CALLBACKS = {
+    'metrics': 1,
+    'graphs': 5,
+    'gauge': 1,
+    'comparison': 1,
+    'table': 1,
+    'reference': 1,
+    'budget': 1,
+}
+
+# Callback requests per second all visible dashboards together may send
+# (hidden tabs send none)
+REQUEST_BUDGET = 20
+
+# A dashboard counts as visible until it misses this many heartbeats
+MISSED_HEARTBEATS = 3
+
+# Disable every panel interval while the tab is hidden. The first (initial)
+# call installs a visibilitychange listener that clicks a hidden trigger
+# button, so the check runs only when visibility actually changes.
+VISIBILITY_SCRIPT = """
+function(n) {
+    if (!window._propellerVisibility) {
+        window._propellerVisibility = true;
+        document.addEventListener('visibilitychange', function() {
+            var trigger = document.getElementById('visibility-trigger');
+            if (trigger) { trigger.click(); }
+        });
+    }
+    return Array(%d).fill(document.hidden);
+}
+"""
+
+
+def request_rate(intervals):
+    """Callback requests per second a visible dashboard sends with these intervals"""
+    return sum(PANEL_CALLBACKS.get(panel, 1) * 1000 / period for panel, period in intervals.items())
+
+
+def apply_request_budget(intervals, budget=REQUEST_BUDGET):
+    """Stretch all intervals evenly so one dashboard stays within budget requests/s"""
+    rate = request_rate(intervals)
+    if not budget or rate <= budget:
+        return dict(intervals)
+    scale = rate / budget
+    return {panel: int(period * scale + 0.5) for panel, period in intervals.items()}
+
+
+def render_key_store(panel):
+    """Id of the dcc.Store holding the render key a client last applied"""
+    return f'render-key-{panel}'
+
+
+class RenderThrottle:
+    def __init__(self, sensor, panel_intervals=PANEL_INTERVALS, request_budget=REQUEST_BUDGET):
+        """
+        Shares rendered panels between clients and skips unchanged ones
+
+        A panel is rebuilt at most once per (sensor snapshot, panel inputs);
+        every other client at that snapshot gets the cached output. Each
+        client keeps the key of the render it last applied in a dcc.Store;
+        the browser only updates it when a response is applied, so a render
+        the browser dropped for a newer request is never counted as
+        delivered. A client that already shows the snapshot gets no update.
+
+        request_budget is shared by all visible dashboards: each one
+        heartbeats through the 'budget' interval and gets intervals
+        stretched to budget / (visible dashboards), so the total request
+        rate stays bounded however many are open.
+        """
+        self.sensor = sensor
+        self.panel_intervals = dict(panel_intervals)
+        self.request_budget = request_budget
+        self.lock = threading.Lock()
+        self.panel_locks = {}
+        self.cache = {}
+        # Client id -> time of its last heartbeat
+        self.clients = {}
+
+    def client_intervals(self):
+        """Intervals that keep the visible dashboards together within the budget"""
+        with self.lock:
+            return self._intervals(len(self.clients))
+
+    def _intervals(self, n_clients):
+        budget = self.request_budget / max(1, n_clients) if self.request_budget else None
+        return apply_request_budget(self.panel_intervals, budget)
+
+    def heartbeat(self, client_id):
+        """Count a dashboard as visible and return its intervals"""
+        now = time.monotonic()
+        with self.lock:
+            # Dashboards that stopped heartbeating (hidden or closed) drop out
+            timeout = MISSED_HEARTBEATS * self._intervals(len(self.clients))['budget'] / 1000
+            for client, seen in list(self.clients.items()):
+                if now - seen > timeout:
+                    del self.clients[client]
+            self.clients[client_id] = now
+            return self._intervals(len(self.clients))
+
+    def snapshot(self):
+        """Identify the sensor's current data (latest sample number)"""
+        latest = self.sensor.get_latest_point()
+        return latest['x_value'] if latest else None
+
+    def render(self, panel, key, build):
+        """Return build()'s output for key, built at most once across clients"""
+        with self.lock:
+            panel_lock = self.panel_locks.setdefault(panel, threading.Lock())
+        # Clients asking for the same key wait for one shared build
+        with panel_lock:
+            cached = self.cache.get(panel)
+            if cached and cached[0] == key:
+                return cached[1]
+            value = build()
+            self.cache[panel] = (key, value)
+            return value
+
+    def panel(self, name):
+        """
+        Decorator for a panel callback with the render key store as its last
+        State and as its last Output
+
+        The wrapped function gets the remaining arguments unchanged and its
+        return value is paired with the new render key.
+        """
+        def decorator(build):
+            @functools.wraps(build)
+            def callback(*args):
+                *params, applied_key = args
+                # n_intervals differs per client, so it is left out of the key
+                key = f"{self.snapshot()}|{params[1:]!r}"
+                if key == applied_key:
+                    raise PreventUpdate
+                return self.render(name, key, lambda: build(*params)), key
+            return callback
+        return decorator
@@ -0,0 +1,92 @@
+# Sensor Source Selection
+import os
+
+SOURCES = ('simulator', 'arduino', 'replay', 'fake-serial')
+
+
+def create_sensor(source=None, port=None, baudrate=115200, replay_file=None, replay_rate=1.0,
+                  sim_rate=1000, sim_format='csv', seed=0, aggregate_window=None):
+    """
+    Create a sensor source by name without importing the others
+
+    The source defaults to the PROPELLER_SOURCE environment variable, then
+    'simulator'. PROPELLER_PORT and PROPELLER_REPLAY_FILE fill in the port
+    and replay file when they are not given.
+
+    'fake-serial' runs the seeded propeller simulator behind a pty and
+    reads it with ArduinoSensorReader, exercising the full serial path.
+    Its aggregate_window defaults to sim_rate, i.e. 1 Hz summaries.
+    """
+    source = source or os.environ.get('PROPELLER_SOURCE', 'simulator')
+    if source == 'simulator':
+        from data_gen import RealTimeDataStreamer
+        return RealTimeDataStreamer()
+    if source == 'arduino':
+        from arduino_sensor_reader import ArduinoSensorReader
+        return ArduinoSensorReader(port=port or os.environ.get('PROPELLER_PORT'), baudrate=baudrate,
+                                   aggregate_window=aggregate_window)
+    if source == 'replay':
+        from data_replay import ReplayStreamer
+        replay_file = replay_file or os.environ.get('PROPELLER_REPLAY_FILE')
+        if not replay_file:
+            raise ValueError("Replay source needs a replay file")
+        return ReplayStreamer(replay_file, rate=replay_rate)
+    if source == 'fake-serial':
+        from arduino_sensor_reader import ArduinoSensorReader
+        from propeller_simulator import PropellerSignalModel, FakeSerialDevice
+        device = FakeSerialDevice(PropellerSignalModel(rate_hz=sim_rate, seed=seed), data_format=sim_format)
+        reader = ArduinoSensorReader(port=device.port, data_format=sim_format, reset_delay=0,
+                                     aggregate_window=aggregate_window or sim_rate, verbose=False)
+        # Started and stopped together with the reader by start_sensor()/stop_sensor()
+        reader.fake_device = device
+        return reader
+    raise ValueError(f"Unknown sensor source: {source} (choose from {', '.join(SOURCES)})")
+
+
+def start_sensor(sensor):
+    """
+    Start a sensor regardless of which source it is
+
+    Add listeners before starting, so they see the first sample.
+    """
+    if hasattr(sensor, 'start_reading'):
+        sensor.start_reading()
+    else:
+        sensor.start_streaming()
+    device = getattr(sensor, 'fake_device', None)
+    if device:
+        device.start()
+
+
+def stop_sensor(sensor):
+    """Stop a sensor started with start_sensor() and release its port"""
+    if hasattr(sensor, 'stop_reading'):
+        sensor.stop_reading()
+    else:
+        sensor.stop_streaming()
+    device = getattr(sensor, 'fake_device', None)
+    if device:
+        device.stop()
+
+
+def add_source_arguments(parser):
+    """Add the sensor source options to an argparse parser"""
+    parser.add_argument('--source', choices=SOURCES, default=None,
+                        help="sensor source (default: $PROPELLER_SOURCE or simulator)")
+    parser.add_argument('--port', default=None, help="Arduino serial port (default: auto-detect)")
+    parser.add_argument('--baudrate', type=int, default=115200, help="Arduino baud rate")
+    parser.add_argument('--replay-file', default=None, help="CSV run to replay")
+    parser.add_argument('--replay-rate', type=float, default=1.0, help="replay speed-up factor")
+    parser.add_argument('--sim-rate', type=int, default=1000, help="fake-serial sample rate (Hz)")
+    parser.add_argument('--sim-format', choices=('csv', 'binary'), default='csv', help="fake-serial wire format")
+    parser.add_argument('--seed', type=int, default=0, help="fake-serial random seed")
+    parser.add_argument('--aggregate-window', type=int, default=None,
+                        help="samples per dashboard summary (Arduino/fake-serial; default: off / sim rate)")
+
+
+def sensor_from_args(args):
+    """Create a sensor from parsed add_source_arguments() options"""
+    return create_sensor(args.source, port=args.port, baudrate=args.baudrate,
+                         replay_file=args.replay_file, replay_rate=args.replay_rate,
+                         sim_rate=args.sim_rate, sim_format=args.sim_format, seed=args.seed,
+                         aggregate_window=args.aggregate_window)
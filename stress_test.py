@@ -0,0 +1,89 @@
+# Serial Ingest Stress Test (no hardware needed, Linux/macOS)
+import argparse
+import threading
+import time
+from arduino_sensor_reader import ArduinoSensorReader
+from propeller_simulator import PropellerSignalModel, FakeSerialDevice
+
+
+def measure_latency(device, progress):
+    """Match each device write to the first moment the reader had ingested it"""
+    latencies = []
+    i = 0
+    for written_at, total in list(device.write_log):
+        while i < len(progress) and (progress[i][1] < total or progress[i][0] < written_at):
+            i += 1
+        if i == len(progress):
+            break
+        latencies.append(progress[i][0] - written_at)
+    return sorted(latencies)
+
+
+def run(rate, data_format='csv', duration=5.0, seed=0):
+    """Stream simulated samples through a pty into ArduinoSensorReader and report"""
+    model = PropellerSignalModel(rate_hz=rate, seed=seed)
+    device = FakeSerialDevice(model, data_format=data_format)
+    reader = ArduinoSensorReader(port=device.port, data_format=data_format, reset_delay=0, verbose=False)
+    reader.poll_interval = 0.001
+
+    # Sample reader progress (time, samples ingested) every millisecond
+    progress = []
+    monitoring = True
+
+    def monitor():
+        while monitoring:
+            progress.append((time.monotonic(), reader.x))
+            time.sleep(0.001)
+
+    # No simulated fallback: a failed connection must not be measured
+    if not reader.start_reading(fallback=False):
+        device.stop()
+        return None
+    monitor_thread = threading.Thread(target=monitor, daemon=True)
+    monitor_thread.start()
+    device.start()
+
+    start = time.monotonic()
+    time.sleep(duration)
+    device.running = False
+    elapsed = time.monotonic() - start
+    time.sleep(0.5)  # Let the reader drain
+    monitoring = False
+    monitor_thread.join()
+    reader.stop_reading()
+    device.stop()
+
+    latencies = measure_latency(device, progress)
+    result = {
+        'rate': rate,
+        'format': data_format,
+        'sent': device.sent,
+        'ingested': reader.x,
+        'throughput': reader.x / elapsed,
+        'latency_p50_ms': 1000 * latencies[len(latencies) // 2] if latencies else None,
+        'latency_p99_ms': 1000 * latencies[int(len(latencies) * 0.99)] if latencies else None,
+    }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serial ingest stress test with a fake Arduino")
+    parser.add_argument('--rate', type=int, nargs='+', default=[1, 100, 1000, 10000], help="sample rates (Hz)")
+    parser.add_argument('--format', choices=('csv', 'binary'), nargs='+', default=['csv', 'binary'])
+    parser.add_argument('--duration', type=float, default=5.0, help="seconds per run")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for data_format in args.format:
+        for rate in args.rate:
+            r = run(rate, data_format, args.duration, args.seed)
+            if r is None:
+                continue
+            p50 = f"{r['latency_p50_ms']:.1f}" if r['latency_p50_ms'] is not None else '-'
+            p99 = f"{r['latency_p99_ms']:.1f}" if r['latency_p99_ms'] is not None else '-'
+            print(f"📈 {data_format:6} {rate:>6} Hz: sent {r['sent']}, ingested {r['ingested']} "
+                  f"({r['throughput']:.0f}/s), latency p50 {p50} ms, p99 {p99} ms")
+
+
+if __name__ == '__main__':
+    main()